@@ -0,0 +1,371 @@
+import numpy as np
+import pandas as pd
+
+from memoria_vendas import coluna_ordenacao, faturamento_centavos
+
+# Número máximo de pontos da série de evolução do faturamento enviada ao gráfico
+MAX_PONTOS_GRAFICO = 500
+
+# Períodos de agregação da série, do mais fino ao mais grosso: (rótulo, frequência, dias por período)
+PERIODOS_SERIE = [('dia', 'D', 1), ('semana', 'W-SUN', 7), ('mês', 'MS', 30.44)]
+
+# Frequência do resample de cada rótulo
+FREQUENCIAS_PERIODO = {periodo: frequencia for periodo, frequencia, _ in PERIODOS_SERIE}
+
+# Período (pandas) de cada rótulo: semanas de domingo a sábado e meses do calendário
+PERIODOS_CALENDARIO = {'semana': 'W-SAT', 'mês': 'M'}
+
+# Limite de células (dias × produtos) das somas acumuladas; acima dele fica só o cubo
+MAX_CELULAS_ACUMULADAS = 5_000_000
+
+
+# Cubo de agregados por (dia, produto): soma de quantidade, soma de faturamento e número de vendas.
+# O faturamento é somado em centavos inteiros (exato) e só no fim convertido para reais.
+def montar_cubo(df):
+    dia = df['data'].dt.normalize().rename('dia')
+    valores = pd.DataFrame({
+        'produto': df['produto'],
+        'quantidade': df['quantidade'].astype('int64') if df['quantidade'].dtype.kind in 'iu' else df['quantidade'],
+        'centavos': faturamento_centavos(df),
+    }, index=df.index)
+    cubo = valores.groupby([dia, 'produto'], observed=True, sort=True).agg(
+        quantidade=('quantidade', 'sum'),
+        faturamento=('centavos', 'sum'),
+        vendas=('centavos', 'size'),
+    )
+    cubo['faturamento'] = cubo['faturamento'] / 100
+    return cubo.reset_index()
+
+
+# Soma cubos parciais (o já calculado e o das linhas recém-anexadas, ou os de vários arquivos)
+def combinar_cubos(*cubos):
+    juntos = pd.concat(cubos, ignore_index=True)
+    juntos['produto'] = juntos['produto'].astype('category')
+    return juntos.groupby(['dia', 'produto'], observed=True, sort=True)[
+        ['quantidade', 'faturamento', 'vendas']
+    ].sum().reset_index()
+
+
+# Índice de filtragem das linhas brutas: datas ordenadas (busca binária) e produtos pelos
+# códigos da categoria. Pressupõe o DataFrame ordenado por data, como entregue pelo carregamento.
+class IndiceVendas:
+    def __init__(self, df):
+        produto = df['produto']
+        if not isinstance(produto.dtype, pd.CategoricalDtype):
+            produto = produto.astype('category')
+        self.datas = pd.DatetimeIndex(df['data'])
+        self.codigos = produto.cat.codes.to_numpy()
+        self.categorias = produto.cat.categories
+        self.tem_produto_ausente = bool((self.codigos < 0).any())
+
+    # Posições [inicio, fim) das linhas entre as duas datas (inclusive o dia final inteiro)
+    def intervalo(self, data_inicio, data_fim):
+        inicio = self.datas.searchsorted(pd.Timestamp(data_inicio), side='left')
+        fim = self.datas.searchsorted(pd.Timestamp(data_fim) + pd.Timedelta(days=1), side='left')
+        return inicio, max(inicio, fim)
+
+    # Tabela booleana indexada pelo código da categoria (a última posição cobre o código -1)
+    def tabela_produtos(self, modelos):
+        tabela = np.zeros(len(self.categorias) + 1, dtype=bool)
+        posicoes = self.categorias.get_indexer(list(modelos))
+        tabela[posicoes[posicoes >= 0]] = True
+        return tabela
+
+    def filtrar(self, df, data_inicio, data_fim, modelos):
+        inicio, fim = self.intervalo(data_inicio, data_fim)
+        recorte = df.iloc[inicio:fim]
+        tabela = self.tabela_produtos(modelos)
+        if tabela[:-1].all() and not self.tem_produto_ausente:
+            return recorte
+        return recorte[tabela[self.codigos[inicio:fim]]]
+
+
+# Recorta o cubo pelo período e pelos modelos selecionados
+def filtrar_cubo(cubo, data_inicio, data_fim, modelos):
+    inicio = pd.Timestamp(data_inicio)
+    fim = pd.Timestamp(data_fim)
+    mascara = (cubo['dia'] >= inicio) & (cubo['dia'] <= fim) & cubo['produto'].isin(modelos)
+    return cubo[mascara]
+
+
+# Indicadores principais a partir de um recorte do cubo
+def calcular_kpis(cubo):
+    vendas = cubo['vendas'].sum()
+    faturamento = cubo['faturamento'].sum()
+    return {
+        'quantidade': cubo['quantidade'].sum(),
+        'faturamento': faturamento,
+        'ticket_medio': faturamento / vendas if vendas else np.nan,
+        'modelos': cubo['produto'].nunique(),
+    }
+
+
+# Faturamento somado por dia
+def faturamento_diario(cubo):
+    return cubo.groupby('dia')['faturamento'].sum().rename_axis('data').reset_index()
+
+
+# Faturamento e quantidade somados por produto, do maior para o menor faturamento
+def faturamento_por_modelo(cubo):
+    por_modelo = cubo.groupby('produto', observed=True)[['faturamento', 'quantidade']].sum().reset_index()
+    return por_modelo.sort_values('faturamento', ascending=False)
+
+
+# Mantém, em cada um de max_pontos // 2 trechos consecutivos, os pontos de mínimo e de máximo
+# (picos e vales continuam visíveis com um número limitado de pontos)
+def decimar_min_max(serie, max_pontos):
+    if len(serie) <= max_pontos:
+        return serie
+    trecho = np.arange(len(serie)) * (max_pontos // 2) // len(serie)
+    valores = serie['faturamento'].reset_index(drop=True).groupby(trecho)
+    posicoes = np.union1d(valores.idxmin().to_numpy(), valores.idxmax().to_numpy())
+    return serie.iloc[posicoes]
+
+
+# Menor período (dia, semana ou mês) em que um intervalo com esse número de dias cabe em max_pontos
+def escolher_periodo(dias, max_pontos=MAX_PONTOS_GRAFICO):
+    for periodo, _, dias_por_periodo in PERIODOS_SERIE:
+        if dias / dias_por_periodo <= max_pontos:
+            break
+    return periodo
+
+
+# Série do gráfico de evolução: o faturamento diário somado por dia, semana ou mês, o menor
+# período que caiba em max_pontos para o intervalo selecionado; se nem por mês couber, os
+# meses são reduzidos preservando mínimos e máximos. Com completa=True, devolve a série diária;
+# com um período ('dia', 'semana' ou 'mês'), soma por ele sem reduzir os pontos.
+def serie_evolucao(faturamento_diario, max_pontos=MAX_PONTOS_GRAFICO, completa=False, periodo=None):
+    if completa or faturamento_diario.empty:
+        return faturamento_diario, 'dia'
+
+    escolhido = periodo is not None
+    if not escolhido:
+        dias = (faturamento_diario['data'].max() - faturamento_diario['data'].min()).days + 1
+        periodo = escolher_periodo(dias, max_pontos)
+    if periodo == 'dia':
+        return faturamento_diario, periodo
+
+    # Semanas de domingo a sábado rotuladas pelo domingo inicial; meses pelo dia 1
+    frequencia = FREQUENCIAS_PERIODO[periodo]
+    rotulo = {'label': 'left', 'closed': 'left'} if frequencia.startswith('W') else {}
+    serie = (
+        faturamento_diario.set_index('data')['faturamento']
+        .resample(frequencia, **rotulo).sum()
+        .rename_axis('data').reset_index()
+    )
+    return (serie if escolhido else decimar_min_max(serie, max_pontos)), periodo
+
+
+# Somas acumuladas (prefixos) por produto ao longo dos dias ordenados do cubo: faturamento em
+# centavos, quantidade e número de vendas. O total de qualquer intervalo de dias é a diferença de
+# duas linhas, sem percorrer os dias do intervalo; semanas e meses são intervalos de dias.
+class SomasAcumuladas:
+    def __init__(self, cubo):
+        self.dias = pd.DatetimeIndex(cubo['dia'].unique()).sort_values()
+        produto = cubo['produto']
+        if not isinstance(produto.dtype, pd.CategoricalDtype):
+            produto = produto.astype('category')
+        self.produtos = produto.cat.categories
+        linhas = self.dias.get_indexer(cubo['dia'])
+        colunas = produto.cat.codes.to_numpy()
+
+        quantidade = cubo['quantidade'].to_numpy()
+        valores = {
+            'centavos': np.round(cubo['faturamento'].to_numpy() * 100).astype('int64'),
+            'quantidade': quantidade.astype('int64' if quantidade.dtype.kind in 'iu' else 'float64'),
+            'vendas': cubo['vendas'].to_numpy().astype('int64'),
+        }
+        self.acumulados = {}
+        for nome, valor in valores.items():
+            # Inteiros em int32 quando a soma dos módulos cabe nele (nenhuma soma acumulada passa dela)
+            tipo = valor.dtype
+            if tipo.kind == 'i' and np.abs(valor).sum() <= np.iinfo('int32').max:
+                tipo = np.dtype('int32')
+            # Linha 0 zerada: o total dos dias [i, j) é acumulado[j] - acumulado[i]
+            matriz = np.zeros((len(self.dias) + 1, len(self.produtos)), dtype=tipo)
+            matriz[linhas + 1, colunas] = valor
+            self.acumulados[nome] = np.cumsum(matriz, axis=0, out=matriz)
+        # Faturamento e vendas de todos os produtos juntos, para as séries sem filtro de modelo
+        self._totais = {nome: self.acumulados[nome].sum(axis=1, dtype='int64') for nome in ('centavos', 'vendas')}
+        self._inicios_periodo = {}
+
+    # Cria as somas do cubo, ou None se a matriz (dias × produtos) passar do limite de células
+    @classmethod
+    def criar(cls, cubo, max_celulas=MAX_CELULAS_ACUMULADAS):
+        if cubo['dia'].nunique() * cubo['produto'].nunique() > max_celulas:
+            return None
+        return cls(cubo)
+
+    # Memória ocupada pelas matrizes e totais
+    def tamanho_em_bytes(self):
+        return sum(matriz.nbytes for matriz in self.acumulados.values()) + sum(
+            total.nbytes for total in self._totais.values()
+        )
+
+    # Posições [i, j) dos dias entre as duas datas (inclusive)
+    def intervalo(self, data_inicio, data_fim):
+        i = self.dias.searchsorted(pd.Timestamp(data_inicio), side='left')
+        j = self.dias.searchsorted(pd.Timestamp(data_fim), side='right')
+        return i, max(i, j)
+
+    # Produtos selecionados (posições nas colunas); sem modelos, todos
+    def _colunas(self, modelos):
+        if not modelos:
+            return None
+        posicoes = self.produtos.get_indexer(list(modelos))
+        return np.unique(posicoes[posicoes >= 0])
+
+    # Totais por produto selecionado no intervalo: a diferença entre duas linhas de cada soma
+    def _totais_produtos(self, data_inicio, data_fim, modelos):
+        i, j = self.intervalo(data_inicio, data_fim)
+        colunas = self._colunas(modelos)
+        totais = {}
+        for nome, acumulado in self.acumulados.items():
+            linha_fim, linha_inicio = acumulado[j], acumulado[i]
+            if colunas is not None:
+                linha_fim, linha_inicio = linha_fim[colunas], linha_inicio[colunas]
+            # Diferenças em int64 (ou float), como as somas do cubo
+            totais[nome] = (linha_fim - linha_inicio).astype(np.promote_types(acumulado.dtype, 'int64'))
+        produtos = self.produtos if colunas is None else self.produtos[colunas]
+        return produtos, totais
+
+    # Indicadores do recorte, como calcular_kpis sobre o cubo filtrado
+    def kpis(self, data_inicio, data_fim, modelos=None):
+        _, totais = self._totais_produtos(data_inicio, data_fim, modelos)
+        vendas = totais['vendas'].sum()
+        faturamento = totais['centavos'].sum() / 100
+        return {
+            'quantidade': totais['quantidade'].sum(),
+            'faturamento': faturamento,
+            'ticket_medio': faturamento / vendas if vendas else np.nan,
+            'modelos': int((totais['vendas'] > 0).sum()),
+        }
+
+    # Faturamento e quantidade por modelo no recorte, do maior para o menor faturamento. Com k,
+    # só os k maiores: seleção parcial (argpartition) e ordenação apenas desses k.
+    def ranking(self, data_inicio, data_fim, modelos=None, k=None):
+        produtos, totais = self._totais_produtos(data_inicio, data_fim, modelos)
+        presentes = np.flatnonzero(totais['vendas'] > 0)
+        centavos = totais['centavos'][presentes]
+        if k is not None and k < len(presentes):
+            maiores = np.argpartition(-centavos, k - 1)[:k]
+        else:
+            maiores = np.arange(len(presentes))
+        ordem = presentes[maiores[np.argsort(-centavos[maiores], kind='stable')]]
+        return pd.DataFrame({
+            'produto': pd.Categorical(produtos[ordem], categories=self.produtos),
+            'faturamento': totais['centavos'][ordem] / 100,
+            'quantidade': totais['quantidade'][ordem],
+        })
+
+    # Número de dias com vendas no intervalo
+    def dias_no_intervalo(self, data_inicio, data_fim):
+        i, j = self.intervalo(data_inicio, data_fim)
+        return j - i
+
+    # Posições dos dias que abrem cada semana ou mês (calculadas uma vez por período)
+    def _inicios(self, periodo):
+        if periodo not in self._inicios_periodo:
+            rotulos = self.dias.to_period(PERIODOS_CALENDARIO[periodo]).start_time
+            mudancas = np.flatnonzero(rotulos[1:] != rotulos[:-1]) + 1
+            self._inicios_periodo[periodo] = (np.concatenate(([0], mudancas)), rotulos)
+        return self._inicios_periodo[periodo]
+
+    # Soma acumulada dos produtos selecionados nas linhas pedidas
+    def _acumulado_selecao(self, nome, linhas, colunas):
+        if colunas is None:
+            return self._totais[nome][linhas]
+        return self.acumulados[nome][linhas][:, colunas].sum(axis=1, dtype='int64')
+
+    # Série do gráfico de evolução no recorte, por dia, semana ou mês: o total de cada período é
+    # a diferença das somas acumuladas nas suas bordas. Sem período, escolhe o menor que caiba em
+    # max_pontos (reduzindo os meses, se preciso, como serie_evolucao).
+    def serie(self, data_inicio, data_fim, modelos=None, periodo=None, max_pontos=MAX_PONTOS_GRAFICO):
+        i, j = self.intervalo(data_inicio, data_fim)
+        colunas = self._colunas(modelos)
+        escolhido = periodo is not None
+        if j == i:
+            return pd.DataFrame({'data': pd.DatetimeIndex([]), 'faturamento': []}), periodo or 'dia'
+        if not escolhido:
+            periodo = escolher_periodo((self.dias[j - 1] - self.dias[i]).days + 1, max_pontos)
+
+        if periodo == 'dia':
+            bordas = np.arange(i, j + 1)
+            datas = self.dias[i:j]
+        else:
+            inicios, rotulos = self._inicios(periodo)
+            internos = inicios[np.searchsorted(inicios, i, side='right'):np.searchsorted(inicios, j, side='left')]
+            bordas = np.concatenate(([i], internos, [j]))
+            datas = rotulos[bordas[:-1]]
+
+        centavos = np.diff(self._acumulado_selecao('centavos', bordas, colunas))
+        vendas = np.diff(self._acumulado_selecao('vendas', bordas, colunas))
+        serie = pd.DataFrame({'data': datas, 'faturamento': centavos / 100})
+
+        if periodo == 'dia':
+            # Como faturamento_diario: só os dias com vendas dos modelos selecionados
+            serie = serie[vendas > 0].reset_index(drop=True)
+        else:
+            # Como o resample: do primeiro ao último período com vendas dos modelos selecionados,
+            # com os períodos sem vendas entre eles zerados
+            com_vendas = np.flatnonzero(vendas > 0)
+            if len(com_vendas) == 0:
+                return serie.iloc[:0], periodo
+            serie = serie.iloc[com_vendas[0]:com_vendas[-1] + 1]
+            calendario = pd.date_range(
+                serie['data'].iloc[0], serie['data'].iloc[-1], freq=FREQUENCIAS_PERIODO[periodo], name='data'
+            )
+            serie = serie.set_index('data')['faturamento'].reindex(calendario, fill_value=0.0).reset_index()
+        if not escolhido:
+            serie = decimar_min_max(serie, max_pontos)
+        return serie, periodo
+
+
+# Visão paginada das linhas brutas: busca por produto e ordenação calculadas sobre posições
+# (sem copiar o DataFrame); apenas as linhas da página pedida são materializadas. A visão guarda
+# só as posições: o mesmo DataFrame usado na criação é passado a cada página pedida.
+class VisaoTabela:
+    def __init__(self, df, busca='', coluna=None, decrescente=False):
+        posicoes = np.arange(len(df))
+        if busca:
+            posicoes = posicoes[self._linhas_encontradas(df['produto'], busca)]
+        if coluna is not None:
+            chave = self._chave_ordenacao(coluna_ordenacao(df, coluna))[posicoes]
+            # A ordem crescente já existente (caso das datas) não precisa ser refeita
+            if pd.Index(chave).is_monotonic_increasing:
+                ordem = np.arange(len(chave))
+            else:
+                ordem = np.argsort(chave, kind='stable')
+            posicoes = posicoes[ordem[::-1] if decrescente else ordem]
+        self.posicoes = posicoes
+
+    @property
+    def total(self):
+        return len(self.posicoes)
+
+    def paginas(self, linhas_por_pagina):
+        return max(1, -(-self.total // linhas_por_pagina))
+
+    # Linhas da página (numerada a partir de 1) do DataFrame usado na criação da visão
+    def pagina(self, df, numero, linhas_por_pagina):
+        inicio = (numero - 1) * linhas_por_pagina
+        return df.iloc[self.posicoes[inicio:inicio + linhas_por_pagina]]
+
+    # Busca sem diferenciar maiúsculas; em categorias, o texto é procurado só nos valores distintos
+    @staticmethod
+    def _linhas_encontradas(produto, busca):
+        if isinstance(produto.dtype, pd.CategoricalDtype):
+            achados = produto.cat.categories.astype(str).str.contains(busca, case=False, regex=False)
+            return np.append(achados, False)[produto.cat.codes.to_numpy()]
+        return produto.astype(str).str.contains(busca, case=False, regex=False).to_numpy()
+
+    # Valores numéricos cuja ordem é a da coluna (categorias e textos pela ordem alfabética)
+    @staticmethod
+    def _chave_ordenacao(serie):
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            posto = np.argsort(np.argsort(serie.cat.categories.astype(str)))
+            # Valores ausentes (código -1) vão para o fim
+            return np.append(posto, len(posto))[serie.cat.codes.to_numpy()]
+        if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+            return serie.to_numpy()
+        return pd.factorize(serie.astype(str), sort=True)[0]
@@ -1,93 +1,230 @@
+import argparse
+import os
+import sys
+
 import pandas as pd
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
-
-# Lendo o arquivo CSV
-df = pd.read_csv('arquivo_vendas.csv')
-
-# Calculando o faturamento
-df['faturamento'] = df['quantidade'] * df['preco_unitario']
-
-# Agrupando por produto e somando o faturamento
-faturamento_por_produto = df.groupby('produto')['faturamento'].sum().reset_index()
-
-# Encontrando o produto com maior e menor faturamento
-produto_maior_faturamento = faturamento_por_produto.loc[faturamento_por_produto['faturamento'].idxmax()]
-produto_menor_faturamento = faturamento_por_produto.loc[faturamento_por_produto['faturamento'].idxmin()]
-
-# Criando um DataFrame mais organizado para o relatório
-relatorio = pd.DataFrame([
-    ['Resumo de Vendas', ''],
-    ['', ''],
-    ['Faturamento por Produto:', ''],
-    *[[f'- {row.produto}', f'R$ {row.faturamento:,.2f}'] for _, row in faturamento_por_produto.iterrows()],
-    ['', ''],
-    ['Produto com Maior Faturamento:', produto_maior_faturamento['produto']],
-    ['Valor:', f'R$ {produto_maior_faturamento["faturamento"]:,.2f}'],
-    ['', ''],
-    ['Produto com Menor Faturamento:', produto_menor_faturamento['produto']],
-    ['Valor:', f'R$ {produto_menor_faturamento["faturamento"]:,.2f}']
-], columns=['Análise', 'Resultado'])
-
-# Criando o Excel com formatação
-with pd.ExcelWriter('relatorio_vendas.xlsx', engine='openpyxl') as writer:
+
+from armazem_vendas import agregados_do_arquivo, ler_agregados, materializar
+from carregamento_vendas import carregar_varios, carregar_vendas, listar_arquivos
+from formatacao_vendas import FORMATO_MOEDA_EXCEL, formatar_moeda
+from memoria_vendas import faturamento_centavos, valores_em_reais
+from excel_vendas import (
+    LINHAS_POR_LOTE,
+    ExportadorBlocos,
+    escrever_resumo,
+    escrever_tabela,
+    escrever_tabela_em_abas,
+    exportar_blocos,
+    novo_workbook,
+)
+
+# Tipos fixos das colunas lidas no modo em blocos (a data não é necessária para o relatório)
+TIPOS_BLOCOS = {'produto': 'str', 'quantidade': 'int64', 'preco_unitario': 'float64'}
+
+
+# Agrupando por produto e somando o faturamento (em centavos, exato), com os dados inteiros em memória
+def faturamento_em_memoria(df):
+    centavos = pd.Series(faturamento_centavos(df), index=df.index, name='faturamento')
+    return (centavos.groupby(df['produto'], observed=True).sum() / 100).reset_index()
+
+
+# Lendo o CSV em blocos e acumulando faturamento (em centavos, exato) e quantidade por produto.
+# A memória fica limitada ao tamanho do bloco mais o número de produtos distintos.
+def faturamento_em_blocos(caminho, linhas_por_bloco):
+    totais = None
+    leitor = pd.read_csv(
+        caminho,
+        usecols=list(TIPOS_BLOCOS),
+        dtype=TIPOS_BLOCOS,
+        chunksize=linhas_por_bloco,
+    )
+    for bloco in leitor:
+        bloco['faturamento'] = (bloco['preco_unitario'] * 100).round().astype('int64') * bloco['quantidade']
+        parcial = bloco.groupby('produto')[['faturamento', 'quantidade']].sum()
+        # Soma pelo índice mantendo os inteiros (o add com fill_value passaria para float)
+        totais = parcial if totais is None else pd.concat([totais, parcial]).groupby(level=0).sum()
+
+    if totais is None:
+        return pd.DataFrame({'produto': [], 'faturamento': [], 'quantidade': []})
+    totais['faturamento'] = totais['faturamento'] / 100
+    return totais.sort_index().rename_axis('produto').reset_index()
+
+
+# Criando um DataFrame mais organizado para o relatório (maior e menor produto, se já conhecidos,
+# vêm dos agregados materializados)
+def montar_resumo(faturamento_por_produto, produto_maior_faturamento=None, produto_menor_faturamento=None):
+    # Encontrando o produto com maior e menor faturamento
+    if produto_maior_faturamento is None:
+        produto_maior_faturamento = faturamento_por_produto.loc[faturamento_por_produto['faturamento'].idxmax()]
+    if produto_menor_faturamento is None:
+        produto_menor_faturamento = faturamento_por_produto.loc[faturamento_por_produto['faturamento'].idxmin()]
+
+    # Valores numéricos (formatados como moeda na planilha); as linhas por produto são montadas coluna a coluna
+    colunas = ['Análise', 'Resultado']
+    cabecalho = pd.DataFrame([
+        ['Resumo de Vendas', ''],
+        ['', ''],
+        ['Faturamento por Produto:', ''],
+    ], columns=colunas)
+    por_produto = pd.DataFrame({
+        'Análise': '- ' + faturamento_por_produto['produto'].astype(str).to_numpy(dtype=object),
+        'Resultado': faturamento_por_produto['faturamento'].to_numpy(dtype=object),
+    })
+    extremos = pd.DataFrame([
+        ['', ''],
+        ['Produto com Maior Faturamento:', produto_maior_faturamento['produto']],
+        ['Valor:', float(produto_maior_faturamento['faturamento'])],
+        ['', ''],
+        ['Produto com Menor Faturamento:', produto_menor_faturamento['produto']],
+        ['Valor:', float(produto_menor_faturamento['faturamento'])]
+    ], columns=colunas)
+    relatorio = pd.concat([cabecalho, por_produto, extremos], ignore_index=True)
+    return relatorio, produto_maior_faturamento, produto_menor_faturamento
+
+
+# Blocos das linhas brutas prontos para o relatório (datas no mesmo formato do CSV de origem)
+def blocos_dados_brutos(df=None, caminho=None, linhas_por_bloco=None):
+    if df is not None:
+        # Sem linhas, ainda sai um bloco vazio: as exportações levam o cabeçalho (ou o esquema)
+        blocos = (df.iloc[inicio:inicio + LINHAS_POR_LOTE] for inicio in range(0, max(len(df), 1), LINHAS_POR_LOTE))
+    else:
+        blocos = pd.read_csv(caminho, dtype={'data': 'str', **TIPOS_BLOCOS}, chunksize=linhas_por_bloco)
+    for bloco in blocos:
+        bloco = valores_em_reais(bloco)
+        if pd.api.types.is_datetime64_any_dtype(bloco['data']):
+            bloco = bloco.assign(data=bloco['data'].dt.strftime('%d/%m/%Y'))
+        if 'faturamento' not in bloco:
+            bloco = bloco.assign(faturamento=bloco['quantidade'] * bloco['preco_unitario'])
+        yield bloco
+
+
+# Exporta as linhas do DataFrame (o botão Download do dashboard) no formato do caminho, em blocos.
+# Parquet mantém os tipos (data, categoria); texto e Excel usam a data como no CSV de origem.
+def exportar_dados(df, caminho, destino=None):
+    if caminho.endswith('.parquet'):
+        blocos = (
+            valores_em_reais(df.iloc[inicio:inicio + LINHAS_POR_LOTE])
+            for inicio in range(0, max(len(df), 1), LINHAS_POR_LOTE)
+        )
+    else:
+        blocos = blocos_dados_brutos(df=df)
+    exportar_blocos(blocos, caminho, destino)
+
+
+# Repassa os blocos ao relatório gravando, no caminho, uma cópia das linhas brutas
+def com_exportacao(blocos, exportador):
+    for bloco in blocos:
+        if exportador is not None:
+            exportador.escrever(bloco)
+        yield bloco
+
+
+# Criando o Excel com formatação, em modo somente escrita (memória constante).
+# A aba de dados brutos é dividida em várias abas se passar do limite de linhas do Excel.
+def gravar_relatorio(caminho_saida, relatorio, faturamento_por_produto, blocos_brutos=None, exportar_brutos=None):
+    wb = novo_workbook()
+
     # Aba Resumo
-    relatorio.to_excel(writer, sheet_name='Resumo', index=False)
-    
-    # Pegando a planilha para formatação
-    ws = writer.sheets['Resumo']
-    
-    # Formatação geral
-    for col in ['A', 'B']:
-        ws.column_dimensions[col].width = 35
-    
-    # Formatando o título
-    ws['A1'].font = Font(bold=True, size=14)
-    ws.merge_cells('A1:B1')
-    ws['A1'].alignment = Alignment(horizontal='center')
-    
-    # Formatando cabeçalhos das seções
-    for row in [3, 6, 9]:  # Linhas com cabeçalhos
-        ws[f'A{row}'].font = Font(bold=True)
-        ws[f'A{row}'].fill = PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
-    
-    # Aba com faturamento por produto
-    faturamento_formatado = faturamento_por_produto.sort_values('faturamento', ascending=False)
-    faturamento_formatado['faturamento'] = faturamento_formatado['faturamento'].apply(lambda x: f'R$ {x:,.2f}')
-    faturamento_formatado.columns = ['Produto', 'Faturamento']
-    
-    faturamento_formatado.to_excel(
-        writer, 
-        sheet_name='Faturamento por Produto',
-        index=False
+    escrever_resumo(wb, relatorio, formato_numeros=FORMATO_MOEDA_EXCEL)
+
+    # Aba com faturamento por produto (valores numéricos, somáveis no Excel, com formato de moeda)
+    faturamento_ordenado = faturamento_por_produto[['produto', 'faturamento']].sort_values('faturamento', ascending=False)
+    faturamento_ordenado.columns = ['Produto', 'Faturamento']
+    escrever_tabela(
+        wb, 'Faturamento por Produto', faturamento_ordenado, [35, 35], formatos={'Faturamento': FORMATO_MOEDA_EXCEL}
+    )
+
+    # Aba com dados brutos (e exportação lateral, se pedida)
+    if blocos_brutos is not None:
+        if exportar_brutos:
+            with ExportadorBlocos(exportar_brutos) as exportador:
+                escrever_tabela_em_abas(wb, 'Dados Brutos', com_exportacao(blocos_brutos, exportador))
+        else:
+            escrever_tabela_em_abas(wb, 'Dados Brutos', blocos_brutos)
+
+    wb.save(caminho_saida)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera o relatório Excel de vendas.')
+    parser.add_argument(
+        '--entrada', nargs='+', default=['arquivo_vendas.csv'],
+        help='CSV de vendas, ou vários arquivos/diretórios (lidos em paralelo e somados)'
+    )
+    parser.add_argument('--saida', default='relatorio_vendas.xlsx', help='Relatório Excel gerado')
+    parser.add_argument(
+        '--blocos', type=int, metavar='LINHAS',
+        help='Lê o CSV em blocos com esse número de linhas (para arquivos maiores que a memória)'
     )
-    
-    # Formatando a aba de faturamento
-    ws = writer.sheets['Faturamento por Produto']
-    for col in ['A', 'B']:
-        ws.column_dimensions[col].width = 35
-    
-    # Formatando cabeçalhos
-    for col in ['A1', 'B1']:
-        ws[col].font = Font(bold=True)
-        ws[col].fill = PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
-    
-    # Aba com dados brutos
-    df.to_excel(writer, sheet_name='Dados Brutos', index=False)
-    
-    # Formatando a aba de dados brutos
-    ws = writer.sheets['Dados Brutos']
-    for col in range(1, len(df.columns) + 1):
-        ws.column_dimensions[get_column_letter(col)].width = 15
-        ws[f'{get_column_letter(col)}1'].font = Font(bold=True)
-        ws[f'{get_column_letter(col)}1'].fill = PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
-
-print("Arquivo 'relatorio_vendas.xlsx' foi criado com sucesso!")
-
-# Exibindo os resultados no console
-print("\nFaturamento por produto:")
-print(faturamento_por_produto)
-print(f"\nProduto com maior faturamento: {produto_maior_faturamento['produto']}")
-print(f"Valor do maior faturamento: R$ {produto_maior_faturamento['faturamento']:,.2f}")
-print(f"\nProduto com menor faturamento: {produto_menor_faturamento['produto']}")
-print(f"Valor do menor faturamento: R$ {produto_menor_faturamento['faturamento']:,.2f}")
\ No newline at end of file
+    parser.add_argument('--sem-dados-brutos', action='store_true', help='Não gera a aba Dados Brutos')
+    parser.add_argument(
+        '--exportar-brutos', metavar='ARQUIVO',
+        help='Grava também as linhas brutas em um arquivo .csv, .csv.gz ou .parquet'
+    )
+    args = parser.parse_args()
+
+    varios = len(args.entrada) > 1 or os.path.isdir(args.entrada[0])
+    if varios and args.blocos:
+        parser.error('--blocos aceita apenas um arquivo de entrada')
+
+    # Agregados materializados (totais por produto e por dia, maior e menor produto), quando disponíveis
+    agregados = None
+
+    if varios:
+        # Vários arquivos: cada um é lido e validado em um processo, com agregados parciais
+        arquivos = []
+        for entrada in args.entrada:
+            arquivos.extend(listar_arquivos(entrada) if os.path.isdir(entrada) else [entrada])
+        lote = carregar_varios(arquivos)
+        for nome, erro in lote.erros.items():
+            print(f"Arquivo ignorado: {nome}: {erro}", file=sys.stderr)
+        if lote.df.empty:
+            sys.exit('Nenhum arquivo de vendas válido foi encontrado.')
+        agregados = materializar(cubo=lote.cubo)
+        blocos_brutos = blocos_dados_brutos(df=lote.df)
+    elif args.blocos:
+        # Agregados gravados ainda válidos dispensam a passada de soma pelo CSV
+        agregados = ler_agregados(args.entrada[0])
+        if agregados is None:
+            faturamento_por_produto = faturamento_em_blocos(args.entrada[0], args.blocos)
+        blocos_brutos = blocos_dados_brutos(caminho=args.entrada[0], linhas_por_bloco=args.blocos)
+    else:
+        # Resumo pelos agregados gravados ao lado do arquivo (refeitos só se a origem mudou); as
+        # linhas (do arquivo colunar, quando atualizado) só são lidas para refazê-los ou para os dados brutos
+        dados = {}
+
+        def carregar():
+            if 'df' not in dados:
+                dados['df'] = carregar_vendas(args.entrada[0])
+            return dados['df']
+
+        agregados, reaproveitados = agregados_do_arquivo(args.entrada[0], carregar)
+        if reaproveitados:
+            print("Resumo a partir dos agregados já calculados para este arquivo.")
+        blocos_brutos = None if args.sem_dados_brutos else blocos_dados_brutos(df=carregar())
+
+    if args.sem_dados_brutos:
+        blocos_brutos = None
+
+    if agregados is not None:
+        faturamento_por_produto = agregados.por_produto
+        relatorio, produto_maior_faturamento, produto_menor_faturamento = montar_resumo(
+            faturamento_por_produto, agregados.maior, agregados.menor
+        )
+    else:
+        relatorio, produto_maior_faturamento, produto_menor_faturamento = montar_resumo(faturamento_por_produto)
+    gravar_relatorio(args.saida, relatorio, faturamento_por_produto, blocos_brutos, args.exportar_brutos)
+
+    print(f"Arquivo '{args.saida}' foi criado com sucesso!")
+
+    # Exibindo os resultados no console
+    print("\nFaturamento por produto:")
+    print(faturamento_por_produto[['produto', 'faturamento']])
+    print(f"\nProduto com maior faturamento: {produto_maior_faturamento['produto']}")
+    print(f"Valor do maior faturamento: {formatar_moeda(produto_maior_faturamento['faturamento'])}")
+    print(f"\nProduto com menor faturamento: {produto_menor_faturamento['produto']}")
+    print(f"Valor do menor faturamento: {formatar_moeda(produto_menor_faturamento['faturamento'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pandas as pd
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from agregados_vendas import (
+    MAX_PONTOS_GRAFICO,
+    calcular_kpis,
+    faturamento_diario,
+    faturamento_por_modelo,
+    filtrar_cubo,
+    montar_cubo,
+    serie_evolucao,
+)
+from cache_vendas import CacheLRU, chave_conteudo
+from carregamento_vendas import COLUNAS_OBRIGATORIAS, FORMATOS_DATA, CarregadorIncremental, processar_arquivo
+
+# Arquivo servido quando a requisição não indica um conjunto enviado
+ARQUIVO_PADRAO = 'arquivo_vendas.csv'
+
+# Intervalo mínimo (segundos) entre duas verificações de linhas novas no arquivo padrão
+INTERVALO_ATUALIZACAO = 1.0
+
+# Threads para o trabalho do pandas (leitura, cubo, agregações), fora do laço de eventos
+MAX_THREADS = min(4, os.cpu_count() or 1)
+
+# Respostas JSON guardadas por rota, conjunto de dados e parâmetros de filtro
+MAX_RESPOSTAS_EM_CACHE = 1024
+MAX_BYTES_RESPOSTAS = 64 * 1024 ** 2
+
+
+# Erro de requisição com o status HTTP a devolver
+class ErroRequisicao(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+def resposta_json(dados, status=200):
+    return Response(json.dumps(dados, ensure_ascii=False).encode('utf-8'), status, media_type='application/json')
+
+
+# Lê uma data AAAA-MM-DD dos parâmetros (None se ausente)
+def _ler_data(parametros, nome):
+    valor = parametros.get(nome)
+    if not valor:
+        return None
+    try:
+        return pd.Timestamp(valor).normalize()
+    except ValueError:
+        raise ErroRequisicao(400, f"Data inválida em '{nome}': {valor} (use AAAA-MM-DD)")
+
+
+def _ler_inteiro(parametros, nome, padrao, minimo=1):
+    valor = parametros.get(nome)
+    if valor is None:
+        return padrao
+    try:
+        numero = int(valor)
+    except ValueError:
+        numero = minimo - 1
+    if numero < minimo:
+        raise ErroRequisicao(400, f"Valor inválido em '{nome}': {valor}")
+    return numero
+
+
+# Filtros da requisição: ?inicio=AAAA-MM-DD&fim=AAAA-MM-DD&modelo=A&modelo=B (todos opcionais)
+def ler_filtros(parametros):
+    inicio = _ler_data(parametros, 'inicio')
+    fim = _ler_data(parametros, 'fim')
+    if inicio is not None and fim is not None and inicio > fim:
+        raise ErroRequisicao(400, "'inicio' é posterior a 'fim'")
+    modelos = tuple(sorted(set(parametros.getlist('modelo'))))
+    return inicio, fim, modelos
+
+
+# Recorte do cubo pelos filtros; sem modelos, vale tudo (como no dashboard)
+def recortar(cubo, inicio, fim, modelos):
+    if inicio is None and fim is None and not modelos:
+        return cubo
+    return filtrar_cubo(
+        cubo,
+        inicio if inicio is not None else cubo['dia'].min(),
+        fim if fim is not None else cubo['dia'].max(),
+        modelos or cubo['produto'].unique(),
+    )
+
+
+# ═══ Cálculo das respostas (executado nas threads) ═══
+
+def calcular_kpis_json(cubo, inicio, fim, modelos):
+    kpis = calcular_kpis(recortar(cubo, inicio, fim, modelos))
+    return {
+        'quantidade': int(kpis['quantidade']),
+        'faturamento': round(float(kpis['faturamento']), 2),
+        'ticket_medio': None if np.isnan(kpis['ticket_medio']) else round(float(kpis['ticket_medio']), 2),
+        'modelos': int(kpis['modelos']),
+    }
+
+
+def calcular_serie_json(cubo, inicio, fim, modelos, max_pontos, completa):
+    serie, periodo = serie_evolucao(
+        faturamento_diario(recortar(cubo, inicio, fim, modelos)), max_pontos, completa
+    )
+    return {
+        'periodo': periodo,
+        'datas': serie['data'].dt.strftime('%Y-%m-%d').tolist(),
+        'faturamento': serie['faturamento'].round(2).tolist(),
+    }
+
+
+def calcular_ranking_json(cubo, inicio, fim, modelos, limite):
+    ranking = faturamento_por_modelo(recortar(cubo, inicio, fim, modelos)).head(limite)
+    ranking = ranking.assign(produto=ranking['produto'].astype(str), faturamento=ranking['faturamento'].round(2))
+    return {'produtos': ranking[['produto', 'faturamento', 'quantidade']].to_dict('records')}
+
+
+# Estado do serviço: arquivo padrão, conjuntos enviados, cubos e respostas em cache
+class ServicoVendas:
+    def __init__(self, caminho=ARQUIVO_PADRAO, max_threads=MAX_THREADS):
+        self.carregador = CarregadorIncremental(caminho)
+        self.uploads = CacheLRU(max_itens=8, max_bytes=1024 ** 3)
+        self.cubos = CacheLRU(max_itens=16)
+        self.respostas = CacheLRU(max_itens=MAX_RESPOSTAS_EM_CACHE, max_bytes=MAX_BYTES_RESPOSTAS)
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='api_vendas')
+        self._verificado_em = None
+        self._trava_padrao = asyncio.Lock()
+        # Cálculos em andamento: requisições iguais e simultâneas aguardam o mesmo resultado
+        self._em_andamento = {}
+
+    async def executar(self, funcao, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, funcao, *args)
+
+    # Conjunto de dados da requisição: um enviado (pela chave) ou o arquivo padrão, atualizado
+    # no máximo a cada INTERVALO_ATUALIZACAO segundos
+    async def conjunto(self, dataset):
+        if dataset:
+            df = self.uploads.get(dataset)
+            if df is None:
+                raise ErroRequisicao(404, f"Conjunto de dados não encontrado: {dataset}")
+            return df
+        async with self._trava_padrao:
+            agora = time.monotonic()
+            if self._verificado_em is None or agora - self._verificado_em >= INTERVALO_ATUALIZACAO:
+                try:
+                    await self.executar(self.carregador.atualizar)
+                except FileNotFoundError:
+                    raise ErroRequisicao(404, f"Arquivo padrão não encontrado: {self.carregador.caminho}")
+                self._verificado_em = agora
+        return self.carregador.df
+
+    # Cubo (dia × produto) do conjunto; o do arquivo padrão é mantido pelo carregador incremental
+    def _cubo(self, df):
+        chave = df.attrs['chave']
+        cubo = self.carregador.cubo_para(chave)
+        if cubo is None:
+            cubo = self.cubos.get(chave)
+        if cubo is None:
+            cubo = montar_cubo(df)
+            self.cubos.put(chave, cubo)
+        return cubo
+
+    def _calcular(self, df, funcao, args):
+        return json.dumps(funcao(self._cubo(df), *args), ensure_ascii=False).encode('utf-8')
+
+    # Resposta JSON da rota para o conjunto e os parâmetros: do cache ou calculada em uma thread
+    async def responder(self, rota, dataset, funcao, *args):
+        df = await self.conjunto(dataset)
+        chave = (rota, df.attrs['chave'], args)
+        conteudo = self.respostas.get(chave)
+        if conteudo is None:
+            futuro = self._em_andamento.get(chave)
+            if futuro is None:
+                futuro = asyncio.ensure_future(self.executar(self._calcular, df, funcao, args))
+                self._em_andamento[chave] = futuro
+                futuro.add_done_callback(lambda _: self._em_andamento.pop(chave, None))
+            conteudo = await asyncio.shield(futuro)
+            self.respostas.put(chave, conteudo)
+        return Response(conteudo, media_type='application/json')
+
+    # Processa um arquivo enviado (como o upload do dashboard) e devolve a chave do conjunto
+    async def enviar(self, conteudo, nome):
+        extensao = nome.rsplit('.', 1)[-1].lower()
+        chave = chave_conteudo(conteudo, extensao, COLUNAS_OBRIGATORIAS, FORMATOS_DATA)
+        df = self.uploads.get(chave)
+        if df is None:
+            try:
+                df = await self.executar(processar_arquivo, conteudo, nome)
+            except ValueError as e:
+                raise ErroRequisicao(400, str(e))
+            df.attrs['chave'] = chave
+            self.uploads.put(chave, df)
+        return {'dataset': chave, 'linhas': len(df), 'carga': df.attrs.get('carga', {})}
+
+
+# ═══ Rotas ═══
+
+def _servico(request):
+    return request.app.state.servico
+
+
+# GET /kpis: quantidade, faturamento, ticket médio e número de modelos do recorte
+async def rota_kpis(request):
+    parametros = request.query_params
+    return await _servico(request).responder(
+        'kpis', parametros.get('dataset'), calcular_kpis_json, *ler_filtros(parametros)
+    )
+
+
+# GET /serie: faturamento por dia (ou semana/mês, limitado a max_pontos; completa=1 para todos os dias)
+async def rota_serie(request):
+    parametros = request.query_params
+    max_pontos = _ler_inteiro(parametros, 'max_pontos', MAX_PONTOS_GRAFICO, minimo=2)
+    completa = parametros.get('completa', '0') in ('1', 'true', 'sim')
+    return await _servico(request).responder(
+        'serie', parametros.get('dataset'), calcular_serie_json, *ler_filtros(parametros), max_pontos, completa
+    )
+
+
+# GET /ranking: faturamento e quantidade por modelo, do maior para o menor (limite opcional)
+async def rota_ranking(request):
+    parametros = request.query_params
+    limite = _ler_inteiro(parametros, 'limite', None)
+    return await _servico(request).responder(
+        'ranking', parametros.get('dataset'), calcular_ranking_json, *ler_filtros(parametros), limite
+    )
+
+
+# POST /conjuntos?nome=vendas.csv com o arquivo no corpo: devolve a chave a usar em ?dataset=
+async def rota_enviar(request):
+    nome = request.query_params.get('nome')
+    if not nome:
+        raise ErroRequisicao(400, "Informe o nome do arquivo em 'nome' (ex.: vendas.csv)")
+    return resposta_json(await _servico(request).enviar(await request.body(), nome))
+
+
+# GET /estado: linhas do arquivo padrão e estatísticas dos caches
+async def rota_estado(request):
+    servico = _servico(request)
+    return resposta_json({
+        'arquivo_padrao': servico.carregador.caminho,
+        'linhas_padrao': servico.carregador.linhas,
+        'conjuntos_enviados': len(servico.uploads),
+        'cache_respostas': servico.respostas.stats(),
+    })
+
+
+async def tratar_erro(request, erro):
+    return resposta_json({'erro': erro.mensagem}, erro.status)
+
+
+def criar_app(caminho=ARQUIVO_PADRAO, max_threads=MAX_THREADS):
+    @asynccontextmanager
+    async def ciclo_de_vida(app):
+        app.state.servico = ServicoVendas(caminho, max_threads)
+        yield
+        app.state.servico.executor.shutdown(wait=False, cancel_futures=True)
+
+    return Starlette(
+        routes=[
+            Route('/kpis', rota_kpis),
+            Route('/serie', rota_serie),
+            Route('/ranking', rota_ranking),
+            Route('/conjuntos', rota_enviar, methods=['POST']),
+            Route('/estado', rota_estado),
+        ],
+        exception_handlers={ErroRequisicao: tratar_erro},
+        lifespan=ciclo_de_vida,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API HTTP com KPIs, série diária e ranking das vendas.')
+    parser.add_argument('--arquivo', default=ARQUIVO_PADRAO, help='Arquivo de vendas servido por padrão')
+    parser.add_argument('--host', default='127.0.0.1', help='Endereço de escuta')
+    parser.add_argument('--porta', type=int, default=8000, help='Porta de escuta')
+    parser.add_argument('--threads', type=int, default=MAX_THREADS, help='Threads para o trabalho do pandas')
+    args = parser.parse_args()
+
+    uvicorn.run(criar_app(args.arquivo, args.threads), host=args.host, port=args.porta, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
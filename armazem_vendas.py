@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from agregados_vendas import SomasAcumuladas, montar_cubo
+from cache_vendas import CacheLRU
+from carregamento_vendas import assinatura_origem
+
+# Versão do layout do arquivo de agregados; mudar invalida os arquivos já gravados
+VERSAO_AGREGADOS = 1
+
+# Conjuntos de dados com agregados mantidos em memória pelo armazém, e a memória total que podem ocupar
+MAX_AGREGADOS_EM_MEMORIA = 16
+MAX_BYTES_AGREGADOS = 512 * 1024 ** 2
+
+
+# Caminho do arquivo de agregados gravado ao lado do arquivo de origem
+def caminho_agregados(caminho_origem):
+    return f'{caminho_origem}.agregados.json'
+
+
+# Agregados materializados de um conjunto de dados: totais por produto e por dia (faturamento,
+# quantidade e número de vendas), os produtos de maior e menor faturamento e, quando calculados a
+# partir do cubo (não gravadas em disco), as somas acumuladas para recortes por período e modelo
+class Agregados:
+    def __init__(self, por_produto, por_dia, somas=None):
+        self.por_produto = por_produto
+        self.por_dia = por_dia
+        self.somas = somas
+        self.maior = por_produto.loc[por_produto['faturamento'].idxmax()] if not por_produto.empty else None
+        self.menor = por_produto.loc[por_produto['faturamento'].idxmin()] if not por_produto.empty else None
+
+    # Memória ocupada (contada no limite do armazém): totais e matrizes das somas acumuladas
+    def tamanho_em_bytes(self):
+        tamanho = sum(int(df.memory_usage(index=True, deep=True).sum()) for df in (self.por_produto, self.por_dia))
+        return tamanho + (self.somas.tamanho_em_bytes() if self.somas is not None else 0)
+
+    def para_json(self, assinatura):
+        return {
+            'assinatura': {**assinatura, 'versao_agregados': VERSAO_AGREGADOS},
+            'por_produto': self.por_produto.assign(produto=self.por_produto['produto'].astype(str)).to_dict('list'),
+            'por_dia': self.por_dia.assign(data=self.por_dia['data'].dt.strftime('%Y-%m-%d')).to_dict('list'),
+        }
+
+    @classmethod
+    def de_json(cls, dados):
+        por_produto = pd.DataFrame(dados['por_produto'])
+        por_produto['produto'] = por_produto['produto'].astype('category')
+        por_dia = pd.DataFrame(dados['por_dia'])
+        por_dia['data'] = pd.to_datetime(por_dia['data'], format='%Y-%m-%d')
+        return cls(por_produto, por_dia)
+
+
+# Soma o cubo (dia × produto) por uma das dimensões; o faturamento é somado em centavos (exato)
+def _somar_cubo(cubo, dimensao):
+    valores = cubo[['quantidade', 'vendas']].assign(
+        centavos=np.round(cubo['faturamento'].to_numpy() * 100).astype('int64')
+    )
+    somas = valores.groupby(cubo[dimensao], observed=True, sort=True).sum()
+    somas.insert(0, 'faturamento', somas.pop('centavos') / 100)
+    return somas.reset_index()
+
+
+# Calcula os agregados a partir do cubo, ou das linhas (montando o cubo) quando ele não é dado
+def materializar(df=None, cubo=None):
+    if cubo is None:
+        cubo = montar_cubo(df)
+    por_produto = _somar_cubo(cubo, 'produto')
+    por_dia = _somar_cubo(cubo, 'dia').rename(columns={'dia': 'data'})
+    return Agregados(por_produto, por_dia, SomasAcumuladas.criar(cubo))
+
+
+# Lê os agregados gravados para o arquivo de origem (None se ausentes ou de outra versão da origem).
+# Sem assinatura, vale a versão atual da origem.
+def ler_agregados(caminho_origem, assinatura=None):
+    try:
+        with open(caminho_agregados(caminho_origem), encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+        assinatura = assinatura or assinatura_origem(caminho_origem)
+    except (OSError, ValueError):
+        return None
+    if dados.get('assinatura') != {**assinatura, 'versao_agregados': VERSAO_AGREGADOS}:
+        return None
+    return Agregados.de_json(dados)
+
+
+# Grava os agregados com a assinatura da origem a que correspondem
+def gravar_agregados(agregados, caminho_origem, assinatura):
+    caminho = caminho_agregados(caminho_origem)
+    # Grava em arquivo temporário e renomeia, para leitores nunca verem um arquivo parcial
+    temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(agregados.para_json(assinatura), arquivo, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+# Agregados de um arquivo de vendas: os gravados, se ainda correspondem à origem; senão calculados
+# a partir das linhas (carregar é chamada só nesse caso) e gravados para as próximas leituras
+def agregados_do_arquivo(caminho_origem, carregar):
+    agregados = ler_agregados(caminho_origem)
+    if agregados is not None:
+        return agregados, True
+    assinatura = assinatura_origem(caminho_origem)
+    agregados = materializar(carregar())
+    try:
+        gravar_agregados(agregados, caminho_origem, assinatura)
+    except OSError:
+        # Sem permissão de escrita: os agregados valem só para esta execução
+        pass
+    return agregados, False
+
+
+# Armazém de agregados compartilhado: cada versão de um conjunto de dados (identificada pela sua
+# chave) é agendada logo após a carga e calculada por uma thread de fundo; quem consulta recebe
+# os agregados prontos ou None, sem esperar pelo cálculo. Das versões de um mesmo arquivo de
+# origem, só a última calculada fica em memória.
+class ArmazemAgregados:
+    def __init__(self, max_itens=MAX_AGREGADOS_EM_MEMORIA, max_bytes=MAX_BYTES_AGREGADOS):
+        self._prontos = CacheLRU(max_itens=max_itens, max_bytes=max_bytes)
+        self._pendentes = {}
+        # Chave da versão em memória de cada arquivo de origem
+        self._versoes = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='agregados')
+        self._lock = threading.Lock()
+
+    # Agenda o cálculo da versão indicada pela chave, se ainda não foi feito nem está em andamento.
+    # Com caminho e assinatura da origem, os agregados também são gravados ao lado da origem
+    # (se a cópia gravada não corresponder a essa versão).
+    def agendar(self, chave, df=None, cubo=None, caminho=None, assinatura=None):
+        with self._lock:
+            if chave in self._pendentes or chave in self._prontos:
+                return
+            self._pendentes[chave] = self._executor.submit(
+                self._calcular, chave, df, cubo, caminho, assinatura
+            )
+
+    def _calcular(self, chave, df, cubo, caminho, assinatura):
+        try:
+            # Calculados sempre a partir do cubo: as somas acumuladas não são gravadas em disco
+            agregados = materializar(df, cubo)
+            # Só grava se a origem ainda for a versão carregada e a cópia gravada for de outra versão
+            if (
+                caminho is not None and assinatura is not None
+                and assinatura_origem(caminho) == assinatura
+                and ler_agregados(caminho, assinatura) is None
+            ):
+                try:
+                    gravar_agregados(agregados, caminho, assinatura)
+                except OSError:
+                    pass
+            self._prontos.put(chave, agregados)
+            if caminho is not None:
+                # As versões são calculadas em ordem (uma thread): a anterior da mesma origem sai da memória
+                anterior = self._versoes.get(caminho)
+                self._versoes[caminho] = chave
+                if anterior is not None and anterior != chave:
+                    self._prontos.remover(anterior)
+        finally:
+            with self._lock:
+                self._pendentes.pop(chave, None)
+
+    # Agregados da versão indicada pela chave; None enquanto estiverem sendo calculados
+    def obter(self, chave):
+        return self._prontos.get(chave)
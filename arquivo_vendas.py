@@ -1,7 +1,16 @@
+import argparse
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import random
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional: sem ele o CSV é gravado pelo pandas e não há Parquet
+    pa = None
+
 # Lista de carros com seus preços base
 carros = {
     'Honda Civic': 120000,
@@ -14,44 +23,140 @@ carros = {
     'Ford Territory': 140000
 }
 
-# Criando lista para armazenar os dados
-dados = []
-
-# Gerando dados para os últimos 30 dias
-data_inicial = datetime.now() - timedelta(days=30)
-
-for dia in range(30):
-    data = data_inicial + timedelta(days=dia)
-    
-    # Para cada dia, geramos algumas vendas aleatórias
-    for _ in range(random.randint(3, 8)):  # 3 a 8 vendas por dia
-        carro = random.choice(list(carros.keys()))
-        preco_base = carros[carro]
-        
-        # Variação aleatória no preço (±5%)
-        preco_unitario = preco_base * random.uniform(0.95, 1.05)
-        
-        # Quantidade vendida (1 a 3 unidades)
-        quantidade = random.randint(1, 3)
-        
-        dados.append({
-            'data': data.strftime('%d/%m/%Y'),
-            'produto': carro,
-            'quantidade': quantidade,
-            'preco_unitario': round(preco_unitario, 2)
+
+# Gera a base de demonstração: 30 dias com 3 a 8 vendas por dia
+def gerar_demo():
+    # Criando lista para armazenar os dados
+    dados = []
+
+    # Gerando dados para os últimos 30 dias
+    data_inicial = datetime.now() - timedelta(days=30)
+
+    for dia in range(30):
+        data = data_inicial + timedelta(days=dia)
+
+        # Para cada dia, geramos algumas vendas aleatórias
+        for _ in range(random.randint(3, 8)):  # 3 a 8 vendas por dia
+            carro = random.choice(list(carros.keys()))
+            preco_base = carros[carro]
+
+            # Variação aleatória no preço (±5%)
+            preco_unitario = preco_base * random.uniform(0.95, 1.05)
+
+            # Quantidade vendida (1 a 3 unidades)
+            quantidade = random.randint(1, 3)
+
+            dados.append({
+                'data': data.strftime('%d/%m/%Y'),
+                'produto': carro,
+                'quantidade': quantidade,
+                'preco_unitario': round(preco_unitario, 2)
+            })
+
+    # Criando o DataFrame
+    df = pd.DataFrame(dados)
+
+    # Salvando em CSV
+    df.to_csv('arquivo_vendas.csv', index=False)
+
+    # Salvando em Excel
+    df.to_excel('arquivo_vendas.xlsx', index=False)
+
+    print("Arquivos 'arquivo_vendas.csv' e 'arquivo_vendas.xlsx' foram criados!")
+
+    # Mostrando as primeiras linhas do DataFrame
+    print("\nPrimeiras linhas do arquivo gerado:")
+    print(df.head())
+
+
+# Catálogo com n produtos: os carros da lista e, além deles, modelos com preço base sorteado
+def catalogo(n_produtos, rng):
+    nomes = list(carros)[:n_produtos]
+    precos = [carros[nome] for nome in nomes]
+    extras = n_produtos - len(nomes)
+    if extras > 0:
+        nomes += [f'Modelo {i}' for i in range(len(carros) + 1, n_produtos + 1)]
+        precos += list(np.round(rng.uniform(60000, 160000, extras), -3))
+    return np.array(nomes, dtype=object), np.array(precos, dtype='float64')
+
+
+# Gera os dados em blocos de dias, com sorteios vetorizados do NumPy.
+# Mesmas colunas e distribuição da base de demonstração (preço ±5% do base, quantidade 1 a 3).
+def gerar_blocos(dias, vendas_por_dia, n_produtos, semente, linhas_por_bloco=1_000_000):
+    rng = np.random.default_rng(semente)
+    nomes, precos_base = catalogo(n_produtos, rng)
+    data_inicial = pd.Timestamp(datetime.now().date()) - pd.Timedelta(days=dias)
+    datas = pd.date_range(data_inicial, periods=dias, freq='D').strftime('%d/%m/%Y').to_numpy(dtype=object)
+    dias_por_bloco = max(1, linhas_por_bloco // vendas_por_dia)
+
+    for inicio in range(0, dias, dias_por_bloco):
+        fim = min(dias, inicio + dias_por_bloco)
+        n = (fim - inicio) * vendas_por_dia
+        produto = rng.integers(0, n_produtos, n)
+        yield pd.DataFrame({
+            'data': np.repeat(datas[inicio:fim], vendas_por_dia),
+            'produto': nomes[produto],
+            'quantidade': rng.integers(1, 4, n),
+            'preco_unitario': np.round(precos_base[produto] * rng.uniform(0.95, 1.05, n), 2),
         })
 
-# Criando o DataFrame
-df = pd.DataFrame(dados)
 
-# Salvando em CSV
-df.to_csv('arquivo_vendas.csv', index=False)
+# Grava os blocos em CSV ou Parquet sem juntar tudo em memória
+def gravar_blocos(blocos, caminho):
+    total = 0
+    if caminho.endswith('.parquet'):
+        if pa is None:
+            raise SystemExit("Gravar Parquet requer o pacote pyarrow.")
+        escritor = None
+        for bloco in blocos:
+            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            escritor = escritor or pq.ParquetWriter(caminho, tabela.schema)
+            escritor.write_table(tabela)
+            total += len(bloco)
+        if escritor is not None:
+            escritor.close()
+    elif pa is not None:
+        # Cabeçalho escrito à parte para sair sem aspas, igual ao CSV da base de demonstração
+        opcoes = pa_csv.WriteOptions(include_header=False, quoting_style='none')
+        with open(caminho, 'wb') as arquivo:
+            escritor = None
+            for bloco in blocos:
+                tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+                if escritor is None:
+                    arquivo.write((','.join(bloco.columns) + '\n').encode('utf-8'))
+                    escritor = pa_csv.CSVWriter(arquivo, tabela.schema, write_options=opcoes)
+                escritor.write_table(tabela)
+                total += len(bloco)
+            if escritor is not None:
+                escritor.close()
+    else:
+        with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+            for bloco in blocos:
+                bloco.to_csv(arquivo, index=False, header=total == 0)
+                total += len(bloco)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Gera dados simulados de vendas. Sem opções, gera a base de demonstração.'
+    )
+    parser.add_argument('--dias', type=int, help='Número de dias (ativa a geração em massa)')
+    parser.add_argument('--vendas-por-dia', type=int, default=1000, help='Linhas geradas por dia')
+    parser.add_argument('--produtos', type=int, default=len(carros), help='Número de modelos')
+    parser.add_argument('--semente', type=int, default=None, help='Semente do gerador aleatório')
+    parser.add_argument('--saida', default='arquivo_vendas.csv', help='Arquivo .csv ou .parquet')
+    parser.add_argument('--linhas-por-bloco', type=int, default=1_000_000, help='Linhas geradas por vez')
+    args = parser.parse_args()
+
+    if args.dias is None:
+        gerar_demo()
+        return
 
-# Salvando em Excel
-df.to_excel('arquivo_vendas.xlsx', index=False)
+    blocos = gerar_blocos(args.dias, args.vendas_por_dia, args.produtos, args.semente, args.linhas_por_bloco)
+    total = gravar_blocos(blocos, args.saida)
+    print(f"Arquivo '{args.saida}' foi criado com {total:,} linhas!")
 
-print("Arquivos 'arquivo_vendas.csv' e 'arquivo_vendas.xlsx' foram criados!")
 
-# Mostrando as primeiras linhas do DataFrame
-print("\nPrimeiras linhas do arquivo gerado:")
-print(df.head())
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from agregados_vendas import (
+    IndiceVendas,
+    SomasAcumuladas,
+    calcular_kpis,
+    faturamento_diario,
+    faturamento_por_modelo,
+    filtrar_cubo,
+    montar_cubo,
+)
+from analise_vendas import (
+    blocos_dados_brutos,
+    exportar_dados,
+    faturamento_em_memoria,
+    gravar_relatorio,
+    montar_resumo,
+)
+from arquivo_vendas import gerar_blocos, gravar_blocos
+from carregamento_vendas import CarregadorIncremental, caminho_colunar, processar_arquivo
+from excel_vendas import PARQUET_DISPONIVEL
+from graficos_vendas import figura_evolucao, figura_pizza, figura_ranking
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow é opcional: sem ele não há pool do Arrow a medir
+    pa = None
+
+# Tamanhos padrão (em linhas) dos conjuntos de dados medidos
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000, 10_000_000]
+
+# Etapas caras demais para todos os tamanhos: limite de linhas de cada uma
+LIMITE_XLSX = 100_000
+LIMITE_RELATORIO = 1_000_000
+
+# Aumento relativo (tempo ou memória) a partir do qual a comparação aponta regressão
+TOLERANCIA_PADRAO = 0.20
+
+# Execuções de cada etapa para a mediana do tempo
+REPETICOES_PADRAO = 3
+
+
+# Pico de memória do pool do pyarrow durante uma chamada. O tracemalloc só vê as alocações do
+# Python; o pool do Arrow (carga do .arrow, exportação em Parquet) é amostrado em uma thread.
+def pico_arrow(funcao, *args):
+    if pa is None:
+        return funcao(*args), 0
+    base = pa.total_allocated_bytes()
+    pico = base
+    terminou = threading.Event()
+
+    def amostrar():
+        nonlocal pico
+        while not terminou.wait(0.001):
+            pico = max(pico, pa.total_allocated_bytes())
+
+    amostrador = threading.Thread(target=amostrar, daemon=True)
+    amostrador.start()
+    try:
+        retorno = funcao(*args)
+    finally:
+        terminou.set()
+        amostrador.join()
+    return retorno, max(pico, pa.total_allocated_bytes()) - base
+
+
+# Mede uma etapa: o tempo é a mediana de várias execuções (uma só seria dominada por ruído) e a
+# memória vem de uma execução à parte com o tracemalloc ligado (o rastreamento deixaria o tempo
+# várias vezes maior), somado ao pico do pool do pyarrow
+def medir(resultados, linhas, etapa, funcao, *args, repeticoes=REPETICOES_PADRAO):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        retorno = funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    segundos = statistics.median(tempos)
+
+    tracemalloc.start()
+    _, arrow = pico_arrow(funcao, *args)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    resultados.append({
+        'linhas': linhas,
+        'etapa': etapa,
+        'segundos': round(segundos, 4),
+        'repeticoes': repeticoes,
+        'pico_mb': round(pico / 1024 ** 2, 2),
+        'pico_arrow_mb': round(arrow / 1024 ** 2, 2),
+    })
+    print(
+        f"{linhas:>12,} {etapa:<24} {segundos:>9.3f}s {pico / 1024 ** 2:>10.1f} MB {arrow / 1024 ** 2:>10.1f} MB Arrow",
+        flush=True,
+    )
+    return retorno
+
+
+# Gera um CSV com o número de linhas pedido, usando o gerador de arquivo_vendas.py
+def gerar_csv(linhas, diretorio):
+    dias = min(365, linhas)
+    caminho = os.path.join(diretorio, f'vendas_{linhas}.csv')
+    gravar_blocos(gerar_blocos(dias, linhas // dias, 8, semente=42), caminho)
+    return caminho
+
+
+# Etapas do dashboard e do relatório para um conjunto de dados
+def executar_tamanho(linhas, diretorio, resultados, repeticoes=REPETICOES_PADRAO):
+    caminho = gerar_csv(linhas, diretorio)
+
+    # load_default_data: carga completa do CSV (e gravação do Arrow), depois a partir do Arrow
+    def carregar_sem_arrow():
+        if os.path.exists(caminho_colunar(caminho)):
+            os.remove(caminho_colunar(caminho))
+        return CarregadorIncremental(caminho).atualizar()
+
+    medir(resultados, linhas, 'carregar_padrao_csv', carregar_sem_arrow, repeticoes=repeticoes)
+    df = medir(
+        resultados, linhas, 'carregar_padrao_arrow', lambda: CarregadorIncremental(caminho).atualizar(),
+        repeticoes=repeticoes,
+    )
+
+    # load_uploaded_data: CSV e Excel enviados
+    with open(caminho, 'rb') as arquivo:
+        conteudo = arquivo.read()
+    medir(resultados, linhas, 'carregar_upload_csv', processar_arquivo, conteudo, 'vendas.csv', repeticoes=repeticoes)
+    if linhas <= LIMITE_XLSX:
+        caminho_xlsx = caminho.replace('.csv', '.xlsx')
+        pd.read_csv(caminho).to_excel(caminho_xlsx, index=False)
+        with open(caminho_xlsx, 'rb') as arquivo:
+            conteudo_xlsx = arquivo.read()
+        medir(
+            resultados, linhas, 'carregar_upload_xlsx', processar_arquivo, conteudo_xlsx, 'vendas.xlsx',
+            repeticoes=repeticoes,
+        )
+    del conteudo
+
+    # Filtros: período central com metade dos modelos
+    dias = df['data'].dt.normalize().unique()
+    data_inicio, data_fim = dias[len(dias) // 4], dias[3 * len(dias) // 4]
+    modelos = list(df['produto'].cat.categories[::2])
+    indice = medir(resultados, linhas, 'indice', IndiceVendas, df, repeticoes=repeticoes)
+    medir(resultados, linhas, 'filtro', indice.filtrar, df, data_inicio, data_fim, modelos, repeticoes=repeticoes)
+
+    # Agregações dos KPIs e dos três gráficos
+    cubo = medir(resultados, linhas, 'cubo', montar_cubo, df, repeticoes=repeticoes)
+
+    def agregar():
+        recorte = filtrar_cubo(cubo, data_inicio, data_fim, modelos)
+        return calcular_kpis(recorte), faturamento_diario(recorte), faturamento_por_modelo(recorte)
+
+    _, diario, por_modelo = medir(resultados, linhas, 'agregacoes', agregar, repeticoes=repeticoes)
+
+    # Mesmas consultas pelas somas acumuladas (KPIs, ranking top 3 e série por semana)
+    somas = medir(resultados, linhas, 'somas_acumuladas', SomasAcumuladas, cubo, repeticoes=repeticoes)
+
+    def consultar_somas():
+        return (
+            somas.kpis(data_inicio, data_fim, modelos),
+            somas.ranking(data_inicio, data_fim, modelos, k=3),
+            somas.serie(data_inicio, data_fim, modelos, 'semana'),
+        )
+
+    medir(resultados, linhas, 'consulta_somas', consultar_somas, repeticoes=repeticoes)
+
+    def figuras():
+        return figura_evolucao(diario), figura_pizza(por_modelo), figura_ranking(por_modelo)
+
+    medir(resultados, linhas, 'figuras', figuras, repeticoes=repeticoes)
+
+    # Botão "Download" da barra lateral (mesma exportação em blocos do clique no dashboard)
+    def exportar(extensao):
+        destino = io.BytesIO()
+        exportar_dados(df, f'vendas{extensao}', destino)
+        return destino.getvalue()
+
+    medir(resultados, linhas, 'exportar_csv', exportar, '.csv', repeticoes=repeticoes)
+    medir(resultados, linhas, 'exportar_csv_gz', exportar, '.csv.gz', repeticoes=repeticoes)
+    if PARQUET_DISPONIVEL:
+        medir(resultados, linhas, 'exportar_parquet', exportar, '.parquet', repeticoes=repeticoes)
+
+    # Relatório Excel de analise_vendas.py
+    if linhas <= LIMITE_RELATORIO:
+        def relatorio():
+            faturamento = faturamento_em_memoria(df)
+            resumo = montar_resumo(faturamento)[0]
+            gravar_relatorio(os.path.join(diretorio, 'relatorio.xlsx'), resumo, faturamento, blocos_dados_brutos(df=df))
+
+        medir(resultados, linhas, 'relatorio_excel', relatorio, repeticoes=repeticoes)
+
+    for nome in os.listdir(diretorio):
+        os.remove(os.path.join(diretorio, nome))
+
+
+# Compara dois resultados e lista as etapas que pioraram além da tolerância
+def comparar(atual, base, tolerancia):
+    referencia = {(r['linhas'], r['etapa']): r for r in base['resultados']}
+    regressoes = []
+    for r in atual['resultados']:
+        anterior = referencia.get((r['linhas'], r['etapa']))
+        if anterior is None:
+            continue
+        for medida in ('segundos', 'pico_mb', 'pico_arrow_mb'):
+            # Ignora variações em medidas muito pequenas, dominadas por ruído (e medidas que a base não tem)
+            minimo = 0.01 if medida == 'segundos' else 1.0
+            if medida not in r or medida not in anterior:
+                continue
+            if r[medida] > minimo and r[medida] > anterior[medida] * (1 + tolerancia):
+                regressoes.append(
+                    f"{r['linhas']:,} linhas / {r['etapa']}: {medida} "
+                    f"{anterior[medida]} -> {r[medida]} (+{r[medida] / max(anterior[medida], 1e-9) - 1:.0%})"
+                )
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede as etapas do dashboard e do relatório de vendas.')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO, help='Linhas de cada conjunto')
+    parser.add_argument('--saida', default='benchmark_resultados.json', help='Arquivo JSON com os resultados')
+    parser.add_argument('--comparar', metavar='BASE_JSON', help='Resultado de referência para apontar regressões')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO, help='Aumento relativo tolerado')
+    parser.add_argument(
+        '--repeticoes', type=int, default=REPETICOES_PADRAO, help='Execuções de cada etapa (vale a mediana do tempo)'
+    )
+    args = parser.parse_args()
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for linhas in args.tamanhos:
+            executar_tamanho(linhas, diretorio, resultados, args.repeticoes)
+
+    saida = {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'resultados': resultados,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(saida, arquivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em '{args.saida}'")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        regressoes = comparar(saida, base, args.tolerancia)
+        if regressoes:
+            print("\nRegressões encontradas:")
+            for linha in regressoes:
+                print(f"- {linha}")
+            sys.exit(1)
+        print("\nNenhuma regressão em relação à base.")
+
+
+if __name__ == '__main__':
+    main()
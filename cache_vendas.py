@@ -0,0 +1,215 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+# Gera uma chave a partir do conteúdo do arquivo e das configurações do parser
+def chave_conteudo(conteudo, *configuracoes):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(conteudo)
+    for item in configuracoes:
+        h.update(b'\x00')
+        h.update(repr(item).encode('utf-8'))
+    return h.hexdigest()
+
+
+# Tamanho aproximado de um valor em bytes (DataFrames usam memory_usage; outros objetos podem
+# informar o próprio tamanho com um método tamanho_em_bytes)
+def tamanho_em_bytes(valor):
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor)
+    if hasattr(valor, 'tamanho_em_bytes'):
+        return valor.tamanho_em_bytes()
+    if hasattr(valor, 'memory_usage'):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    return 0
+
+
+# Cache LRU limitado por quantidade de itens e por memória, compartilhado entre sessões
+class CacheLRU:
+    def __init__(self, max_itens=8, max_bytes=None):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()
+        self._tamanhos = {}
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    def get(self, chave):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave]
+            self.falhas += 1
+            return None
+
+    def put(self, chave, valor):
+        tamanho = tamanho_em_bytes(valor)
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+            self._itens[chave] = valor
+            self._tamanhos[chave] = tamanho
+            self._remover_excedentes()
+
+    def _remover_excedentes(self):
+        # Remove os itens menos usados recentemente, mantendo sempre o mais novo
+        while len(self._itens) > 1 and (
+            len(self._itens) > self.max_itens
+            or (self.max_bytes is not None and self.bytes_em_uso > self.max_bytes)
+        ):
+            chave, _ = self._itens.popitem(last=False)
+            self._tamanhos.pop(chave, None)
+            self.remocoes += 1
+
+    @property
+    def bytes_em_uso(self):
+        return sum(self._tamanhos.values())
+
+    def remover(self, chave):
+        with self._lock:
+            if self._itens.pop(chave, None) is not None:
+                self._tamanhos.pop(chave, None)
+                self.remocoes += 1
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+            self._tamanhos.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+    # Verifica a presença da chave sem contar acerto/falha nem alterar a ordem de uso
+    def __contains__(self, chave):
+        with self._lock:
+            return chave in self._itens
+
+    def stats(self):
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'remocoes': self.remocoes,
+                'itens': len(self._itens),
+                'bytes': self.bytes_em_uso,
+                'taxa_acerto': self.acertos / total if total else 0.0,
+            }
+
+
+# Registro de conjuntos de dados compartilhado entre as sessões: cada conjunto (identificado pela
+# chave do conteúdo) existe uma única vez no processo, com a contagem das sessões que o usam.
+# Conjuntos sem sessões são removidos após tempo_ocioso segundos, ou antes se o total passar de
+# max_bytes; uma sessão que não aparece há tempo_sessao segundos (aba fechada) deixa de contar.
+class RegistroDatasets:
+    def __init__(self, max_bytes=None, tempo_ocioso=600, tempo_sessao=1800, relogio=time.monotonic):
+        self.max_bytes = max_bytes
+        self.tempo_ocioso = tempo_ocioso
+        self.tempo_sessao = tempo_sessao
+        self._relogio = relogio
+        self._dados = {}
+        self._tamanhos = {}
+        self._ultimo_uso = {}
+        self._sessoes = {}
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    # Conjunto já registrado (ou None), passando a contar a sessão como usuária dele
+    def adquirir(self, chave, sessao):
+        with self._lock:
+            agora = self._relogio()
+            self._remover_ociosos(agora)
+            df = self._dados.get(chave)
+            if df is None:
+                self.falhas += 1
+                return None
+            self.acertos += 1
+            self._vincular(sessao, chave, agora)
+            return df
+
+    # Registra um conjunto recém-carregado. Se outra sessão registrou a mesma chave enquanto
+    # este era carregado, devolve o já registrado, para existir uma única cópia.
+    def publicar(self, chave, sessao, df):
+        tamanho = tamanho_em_bytes(df)
+        with self._lock:
+            agora = self._relogio()
+            if chave not in self._dados:
+                self._dados[chave] = df
+                self._tamanhos[chave] = tamanho
+            self._vincular(sessao, chave, agora)
+            self._remover_ociosos(agora)
+            return self._dados[chave]
+
+    # A sessão deixa de usar o conjunto que tinha (dados limpos ou arquivo removido)
+    def liberar(self, sessao):
+        with self._lock:
+            anterior = self._sessoes.pop(sessao, None)
+            if anterior is not None:
+                self._ultimo_uso[anterior[0]] = self._relogio()
+
+    def referencias(self, chave):
+        with self._lock:
+            return sum(1 for chave_sessao, _ in self._sessoes.values() if chave_sessao == chave)
+
+    def _vincular(self, sessao, chave, agora):
+        anterior = self._sessoes.get(sessao)
+        if anterior is not None and anterior[0] != chave:
+            self._ultimo_uso[anterior[0]] = agora
+        self._sessoes[sessao] = (chave, agora)
+        self._ultimo_uso[chave] = agora
+
+    def _remover(self, chave):
+        self._dados.pop(chave)
+        self._tamanhos.pop(chave)
+        self._ultimo_uso.pop(chave, None)
+        self.remocoes += 1
+
+    def _remover_ociosos(self, agora):
+        for sessao, (chave, visto) in list(self._sessoes.items()):
+            if agora - visto > self.tempo_sessao:
+                del self._sessoes[sessao]
+        em_uso = {chave for chave, _ in self._sessoes.values()}
+        livres = sorted((c for c in self._dados if c not in em_uso), key=self._ultimo_uso.get)
+        for chave in livres:
+            if agora - self._ultimo_uso[chave] > self.tempo_ocioso:
+                self._remover(chave)
+        # Acima do limite de memória, remove os conjuntos sem sessões do menos para o mais recente
+        for chave in livres:
+            if self.max_bytes is None or self.bytes_em_uso <= self.max_bytes:
+                break
+            if chave in self._dados:
+                self._remover(chave)
+
+    @property
+    def bytes_em_uso(self):
+        return sum(self._tamanhos.values())
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+            self._tamanhos.clear()
+            self._ultimo_uso.clear()
+            self._sessoes.clear()
+
+    def __len__(self):
+        return len(self._dados)
+
+    def stats(self):
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'remocoes': self.remocoes,
+                'itens': len(self._dados),
+                'sessoes': len(self._sessoes),
+                'bytes': self.bytes_em_uso,
+                'taxa_acerto': self.acertos / total if total else 0.0,
+            }
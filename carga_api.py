@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+from diagnostico_vendas import PERCENTIS
+
+# Rotas consultadas pelos clientes simulados
+ROTAS = ['/kpis', '/serie', '/ranking']
+
+
+# Conexão HTTP/1.1 mantida aberta (keep-alive) por um cliente simulado
+class ConexaoHTTP:
+    def __init__(self, host, porta):
+        self.host = host
+        self.porta = porta
+        self.leitor = None
+        self.escritor = None
+
+    async def get(self, caminho):
+        if self.escritor is None:
+            self.leitor, self.escritor = await asyncio.open_connection(self.host, self.porta)
+        self.escritor.write(
+            f'GET {caminho} HTTP/1.1\r\nHost: {self.host}:{self.porta}\r\nConnection: keep-alive\r\n\r\n'.encode('ascii')
+        )
+        await self.escritor.drain()
+
+        status = int((await self.leitor.readline()).split()[1])
+        tamanho = 0
+        fechar = False
+        while True:
+            linha = await self.leitor.readline()
+            if linha in (b'\r\n', b''):
+                break
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            if nome.lower() == 'content-length':
+                tamanho = int(valor)
+            elif nome.lower() == 'connection' and valor.strip().lower() == 'close':
+                fechar = True
+        corpo = await self.leitor.readexactly(tamanho)
+        if fechar:
+            await self.fechar()
+        return status, corpo
+
+    async def fechar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+            self.leitor = self.escritor = None
+
+
+# Caminho com os parâmetros da consulta (e o conjunto enviado, se indicado)
+def montar_caminho(rota, parametros, dataset=None):
+    if dataset:
+        parametros = {**parametros, 'dataset': dataset}
+    return f'{rota}?{urlencode(parametros, doseq=True)}' if parametros else rota
+
+
+# Caminhos das requisições: sem --variar, um conjunto fixo de filtros (respondidos do cache após
+# a primeira vez); com --variar, períodos e modelos sorteados a cada requisição
+class GeradorCaminhos:
+    def __init__(self, modelos, dias, variar, dataset=None, semente=None):
+        self.modelos = modelos
+        self.dias = dias
+        self.variar = variar
+        self.dataset = dataset
+        self.aleatorio = random.Random(semente)
+        self.fixos = [montar_caminho(rota, {}, dataset) for rota in ROTAS] + [
+            montar_caminho(rota, {'modelo': modelos[:2]}, dataset) for rota in ROTAS
+        ]
+
+    def proximo(self):
+        if not self.variar:
+            return self.aleatorio.choice(self.fixos)
+        inicio = self.aleatorio.randrange(len(self.dias))
+        fim = self.aleatorio.randrange(inicio, len(self.dias))
+        parametros = {
+            'inicio': self.dias[inicio],
+            'fim': self.dias[fim],
+            'modelo': self.aleatorio.sample(self.modelos, self.aleatorio.randint(1, len(self.modelos))),
+        }
+        return montar_caminho(self.aleatorio.choice(ROTAS), parametros, self.dataset)
+
+
+async def cliente(host, porta, gerador, fim, latencias, erros):
+    conexao = ConexaoHTTP(host, porta)
+    try:
+        while time.perf_counter() < fim:
+            caminho = gerador.proximo()
+            inicio = time.perf_counter()
+            try:
+                status, _ = await conexao.get(caminho)
+            except (OSError, asyncio.IncompleteReadError, IndexError, ValueError):
+                await conexao.fechar()
+                erros.append(caminho)
+                continue
+            latencias.append(time.perf_counter() - inicio)
+            if status != 200:
+                erros.append(caminho)
+    finally:
+        await conexao.fechar()
+
+
+async def executar(args):
+    url = urlsplit(args.url)
+    host, porta = url.hostname, url.port or 80
+
+    # Modelos e dias disponíveis, para montar os filtros
+    conexao = ConexaoHTTP(host, porta)
+    status, corpo = await conexao.get(montar_caminho('/ranking', {}, args.dataset))
+    if status != 200:
+        raise SystemExit(f"Falha ao consultar {args.url}/ranking: HTTP {status} {corpo.decode('utf-8', 'replace')}")
+    modelos = [item['produto'] for item in json.loads(corpo)['produtos']]
+    _, corpo = await conexao.get(montar_caminho('/serie', {'completa': 1}, args.dataset))
+    dias = json.loads(corpo)['datas']
+    await conexao.fechar()
+
+    gerador = GeradorCaminhos(modelos, dias, args.variar, args.dataset, args.semente)
+    latencias, erros = [], []
+    inicio = time.perf_counter()
+    fim = inicio + args.duracao
+    await asyncio.gather(*(
+        cliente(host, porta, gerador, fim, latencias, erros) for _ in range(args.clientes)
+    ))
+    return latencias, erros, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga local da API de vendas (vazão e latência).')
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Endereço da API')
+    parser.add_argument('--clientes', type=int, default=32, help='Clientes simultâneos')
+    parser.add_argument('--duracao', type=float, default=10.0, help='Duração do teste em segundos')
+    parser.add_argument('--variar', action='store_true', help='Sorteia período e modelos (força falhas de cache)')
+    parser.add_argument('--dataset', help='Chave de um conjunto enviado (padrão: arquivo padrão da API)')
+    parser.add_argument('--semente', type=int, help='Semente do sorteio dos filtros')
+    args = parser.parse_args()
+
+    latencias, erros, segundos = asyncio.run(executar(args))
+    print(f"Clientes: {args.clientes} · duração: {segundos:.1f} s · filtros {'sorteados' if args.variar else 'fixos'}")
+    print(f"Requisições: {len(latencias):,} ({len(erros):,} com erro)")
+    print(f"Vazão: {len(latencias) / segundos:,.1f} req/s")
+    if latencias:
+        valores = np.percentile(np.array(latencias) * 1000, PERCENTIS)
+        print("Latência: " + ' · '.join(f"p{p} {v:.1f} ms" for p, v in zip(PERCENTIS, valores))
+              + f" · máx. {max(latencias) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
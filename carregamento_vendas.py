@@ -0,0 +1,569 @@
+import io
+import json
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from agregados_vendas import combinar_cubos, montar_cubo
+from memoria_vendas import compactar_vendas, memoria_em_bytes
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow é opcional: sem ele os dados são sempre lidos do CSV
+    pa = None
+    feather = None
+
+# Colunas obrigatórias para o dashboard e para a análise
+COLUNAS_OBRIGATORIAS = ['data', 'produto', 'quantidade', 'preco_unitario']
+
+# Formatos de data testados, em ordem, nos arquivos enviados
+FORMATOS_DATA = ['%d/%m/%Y', '%Y-%m-%d', '%m/%d/%Y', '%d-%m-%Y']
+
+# Quantidade de valores distintos usados para detectar o formato das datas
+TAMANHO_AMOSTRA_DATAS = 1000
+
+# Formato de data do arquivo gerado por arquivo_vendas.py
+FORMATO_DATA_PADRAO = '%d/%m/%Y'
+
+# Arquivos enviados a partir destes tamanhos são lidos em partes, informando o progresso;
+# os menores são lidos de uma vez. O Excel, compactado e bem mais lento de ler, tem limite menor.
+TAMANHO_MINIMO_PROGRESSO_CSV = 2 * 1024 ** 2
+TAMANHO_MINIMO_PROGRESSO_EXCEL = 256 * 1024
+
+# Linhas lidas por bloco do CSV e linhas do Excel entre dois avisos de progresso
+LINHAS_POR_BLOCO_LEITURA = 100_000
+LINHAS_POR_AVISO_EXCEL = 10_000
+
+# Versão do layout do arquivo colunar; mudar invalida os arquivos já gravados
+VERSAO_COLUNAR = 3
+CHAVE_METADADOS = b'vendas_origem'
+
+
+# Aplica os tipos definitivos das colunas, calcula o faturamento e ordena por data. A memória do
+# DataFrame como foi lido (antes dos tipos) fica em df.attrs['bytes_lidos'], para o relatório de
+# memória da forma compacta
+def tipar_vendas(df):
+    df.attrs['bytes_lidos'] = memoria_em_bytes(df)
+    df['produto'] = df['produto'].astype('category')
+    df['faturamento'] = df['quantidade'] * df['preco_unitario']
+    return df.sort_values('data', kind='stable', ignore_index=True)
+
+
+# Lê o CSV padrão gerado por arquivo_vendas.py
+def ler_csv_vendas(caminho):
+    df = pd.read_csv(caminho)
+    df['data'] = pd.to_datetime(df['data'], format=FORMATO_DATA_PADRAO)
+    return tipar_vendas(df)
+
+
+# Escolhe, a partir de uma amostra de valores distintos, o formato que converte mais datas
+def detectar_formato_data(valores, formatos=FORMATOS_DATA, tamanho_amostra=TAMANHO_AMOSTRA_DATAS):
+    amostra = pd.Series(valores[:tamanho_amostra], dtype=object)
+    melhor_formato, melhor_acertos = None, 0
+    for fmt in formatos:
+        acertos = pd.to_datetime(amostra, format=fmt, errors='coerce').notna().sum()
+        # Em caso de empate vale a ordem de FORMATOS_DATA (dia/mês antes de mês/dia)
+        if acertos > melhor_acertos:
+            melhor_formato, melhor_acertos = fmt, acertos
+        if acertos == len(amostra):
+            break
+    return melhor_formato
+
+
+# Converte a coluna de datas interpretando cada texto distinto uma única vez
+def converter_datas(serie, formatos=FORMATOS_DATA):
+    info = {'formato_data': None, 'datas_inferidas': 0, 'descartadas_data': 0}
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        info['descartadas_data'] = int(serie.isna().sum())
+        return serie, info
+
+    # Arquivos de vendas têm poucas datas distintas e muitas linhas: converte só os valores únicos
+    codigos, unicos = pd.factorize(serie)
+    unicos = pd.Series(unicos, dtype=object).map(lambda v: v.strip() if isinstance(v, str) else v)
+
+    formato = detectar_formato_data(unicos.to_numpy(), formatos)
+    info['formato_data'] = formato
+    if formato is not None:
+        convertidos = pd.to_datetime(unicos, format=formato, errors='coerce')
+    else:
+        convertidos = pd.Series(pd.NaT, index=unicos.index, dtype='datetime64[ns]')
+
+    # Valores fora do formato detectado: demais formatos e, por fim, inferência (dia primeiro),
+    # aplicados apenas a esses valores
+    pendentes = convertidos.isna().to_numpy()
+    if pendentes.any():
+        for fmt in formatos:
+            restantes = convertidos.isna().to_numpy()
+            if fmt == formato or not restantes.any():
+                continue
+            convertidos[restantes] = pd.to_datetime(unicos[restantes], format=fmt, errors='coerce')
+        restantes = convertidos.isna().to_numpy()
+        if restantes.any():
+            convertidos[restantes] = pd.to_datetime(
+                unicos[restantes], format='mixed', dayfirst=True, errors='coerce'
+            )
+        inferidos = pendentes & convertidos.notna().to_numpy()
+        ocorrencias = np.bincount(codigos[codigos >= 0], minlength=len(unicos))
+        info['datas_inferidas'] = int(ocorrencias[inferidos].sum())
+
+    # Expande os valores convertidos de volta para todas as linhas (-1 = valor ausente)
+    valores = np.append(convertidos.to_numpy(), np.datetime64('NaT'))
+    datas = pd.Series(valores[codigos], index=serie.index)
+    info['descartadas_data'] = int(datas.isna().sum())
+    return datas, info
+
+
+# Lê o CSV em blocos, informando a fração de bytes já consumida
+def _ler_csv_com_progresso(conteudo, progresso):
+    buffer = io.BytesIO(conteudo)
+    total_mb = len(conteudo) / 1024 ** 2
+    blocos = []
+    for bloco in pd.read_csv(buffer, chunksize=LINHAS_POR_BLOCO_LEITURA):
+        blocos.append(bloco)
+        lidos = min(buffer.tell(), len(conteudo))
+        progresso(lidos / len(conteudo), f"Lendo CSV: {lidos / 1024 ** 2:,.1f} de {total_mb:,.1f} MB")
+    return pd.concat(blocos, ignore_index=True)
+
+
+# Lê a primeira planilha do .xlsx linha a linha (modo somente leitura), informando as linhas lidas
+def _ler_xlsx_com_progresso(conteudo, progresso):
+    # Importado só ao ler um Excel: o openpyxl pesa na inicialização do dashboard
+    from openpyxl import load_workbook
+
+    wb = load_workbook(io.BytesIO(conteudo), read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        total = ws.max_row
+        linhas = ws.iter_rows(values_only=True)
+        cabecalho = next(linhas, ())
+        colunas = [valor if valor is not None else f'Unnamed: {i}' for i, valor in enumerate(cabecalho)]
+        dados = []
+        # max_row vem da dimensão gravada na planilha e inclui o cabeçalho (pode faltar)
+        total = total - 1 if total and total > 1 else None
+        texto_total = f'{total:,}' if total else '?'
+        for linha in linhas:
+            # Linhas totalmente vazias são ignoradas, como em pd.read_excel
+            if all(valor is None for valor in linha):
+                continue
+            dados.append(linha)
+            if len(dados) % LINHAS_POR_AVISO_EXCEL == 0:
+                fracao = min(len(dados) / total, 1.0) if total else 0.0
+                progresso(fracao, f"Lendo Excel: {len(dados):,} de {texto_total} linhas")
+    finally:
+        wb.close()
+    return pd.DataFrame.from_records(dados, columns=colunas)
+
+
+# Lê a tabela do arquivo enviado; com progresso (função que recebe a fração e um texto),
+# arquivos grandes são lidos em partes e cada parte lida é informada
+def ler_tabela(conteudo, nome, progresso=None):
+    if nome.endswith('.csv'):
+        if progresso is not None and len(conteudo) >= TAMANHO_MINIMO_PROGRESSO_CSV:
+            return _ler_csv_com_progresso(conteudo, progresso)
+        return pd.read_csv(io.BytesIO(conteudo))
+    if nome.endswith('.xlsx') and progresso is not None and len(conteudo) >= TAMANHO_MINIMO_PROGRESSO_EXCEL:
+        return _ler_xlsx_com_progresso(conteudo, progresso)
+    if nome.endswith(('.xlsx', '.xls')):
+        return pd.read_excel(io.BytesIO(conteudo))
+    raise ValueError("Formato não suportado. Envie um arquivo CSV ou Excel (.xlsx/.xls).")
+
+
+# Função para ler e normalizar o conteúdo de um arquivo enviado
+def processar_arquivo(conteudo, nome, progresso=None):
+    # A extensão vale sem diferenciar maiúsculas (VENDAS.CSV)
+    df = ler_tabela(conteudo, nome.lower(), progresso)
+
+    # Normalizar nomes das colunas (minúsculo, sem espaços extras)
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+
+    # Verificar colunas obrigatórias
+    colunas_faltando = [col for col in COLUNAS_OBRIGATORIAS if col not in df.columns]
+    if colunas_faltando:
+        # Texto simples: exibido no dashboard e também no terminal pela análise
+        raise ValueError(
+            f"Colunas obrigatórias não encontradas: {', '.join(colunas_faltando)}. "
+            f"O arquivo precisa ter as colunas: {', '.join(COLUNAS_OBRIGATORIAS)}"
+        )
+
+    # Converter tipos
+    linhas_lidas = len(df)
+    df['quantidade'] = pd.to_numeric(df['quantidade'], errors='coerce')
+    df['preco_unitario'] = pd.to_numeric(df['preco_unitario'], errors='coerce')
+    df = df.dropna(subset=['quantidade', 'preco_unitario'])
+    descartadas_numericas = linhas_lidas - len(df)
+
+    # Detectar o formato de data por amostragem e converter a coluna uma única vez
+    df['data'], info_datas = converter_datas(df['data'])
+    df = df.dropna(subset=['data'])
+
+    if df.empty:
+        raise ValueError("Nenhum dado válido encontrado após o processamento.")
+
+    df.attrs['carga'] = {
+        'linhas_lidas': linhas_lidas,
+        'linhas_validas': len(df),
+        'descartadas_numericas': descartadas_numericas,
+        **info_datas,
+    }
+    df = tipar_vendas(df)
+    return compactar_vendas(df, df.attrs.pop('bytes_lidos'))
+
+
+# ═══ Armazenamento colunar (Arrow) ═══
+
+# Caminho do arquivo colunar gravado ao lado do arquivo de origem
+def caminho_colunar(caminho_origem):
+    return f'{caminho_origem}.arrow'
+
+
+# Identifica a versão do arquivo de origem pelo tamanho e data de modificação
+def assinatura_origem(caminho_origem, info=None):
+    info = info or os.stat(caminho_origem)
+    return {
+        'versao': VERSAO_COLUNAR,
+        'tamanho': info.st_size,
+        'mtime_ns': info.st_mtime_ns,
+    }
+
+
+# Lê a assinatura gravada nos metadados do arquivo colunar (None se ausente ou inválida)
+def _assinatura_colunar(caminho):
+    try:
+        with pa.memory_map(caminho, 'r') as origem:
+            metadados = pa.ipc.open_file(origem).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    bruto = metadados.get(CHAVE_METADADOS)
+    return json.loads(bruto) if bruto else None
+
+
+# Verifica se o arquivo colunar existe e corresponde à versão atual da origem
+def colunar_atualizado(caminho_origem):
+    if pa is None:
+        return False
+    caminho = caminho_colunar(caminho_origem)
+    if not os.path.exists(caminho):
+        return False
+    return _assinatura_colunar(caminho) == assinatura_origem(caminho_origem)
+
+
+# Grava o DataFrame normalizado em formato Arrow, com a assinatura da origem (o df.attrs, como
+# a memória do CSV lido, vai junto nos metadados do pandas e volta na leitura)
+def gravar_colunar(df, caminho_origem, assinatura):
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[CHAVE_METADADOS] = json.dumps(assinatura).encode('utf-8')
+    tabela = tabela.replace_schema_metadata(metadados)
+
+    # Grava em arquivo temporário e renomeia, para leitores nunca verem um arquivo parcial
+    caminho = caminho_colunar(caminho_origem)
+    temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+    feather.write_feather(tabela, temporario, compression='uncompressed')
+    os.replace(temporario, caminho)
+
+
+# Lê o arquivo colunar via memory-map, sem reinterpretar texto
+def ler_colunar(caminho_origem):
+    tabela = feather.read_table(caminho_colunar(caminho_origem), memory_map=True)
+    return tabela.to_pandas()
+
+
+# Carrega as vendas de um CSV, usando o arquivo colunar quando ele estiver atualizado
+def carregar_vendas(caminho='arquivo_vendas.csv', usar_colunar=True):
+    if usar_colunar and colunar_atualizado(caminho):
+        return ler_colunar(caminho)
+
+    # Assinatura tomada antes da leitura: se a origem mudar durante a leitura, o arquivo
+    # colunar já nasce desatualizado e será refeito na próxima carga
+    assinatura = assinatura_origem(caminho)
+    df = ler_csv_vendas(caminho)
+    if usar_colunar and pa is not None:
+        try:
+            gravar_colunar(df, caminho, assinatura)
+        except OSError:
+            # Sem permissão de escrita: segue apenas com o CSV
+            pass
+    return df
+
+
+# ═══ Carga incremental ═══
+
+# Bytes do fim do trecho já lido usados para detectar se o arquivo foi reescrito
+TAMANHO_ANCORA = 4096
+
+
+# Junta dois DataFrames de vendas sem alterar os originais, unindo as categorias de produto
+def concatenar_vendas(df, novos):
+    categorias = df['produto'].cat.categories
+    categorias = categorias.append(novos['produto'].cat.categories.difference(categorias))
+    juntos = pd.concat(
+        [
+            df.assign(produto=df['produto'].cat.set_categories(categorias)),
+            novos.assign(produto=novos['produto'].cat.set_categories(categorias)),
+        ],
+        ignore_index=True,
+    )
+    # Linhas anexadas normalmente são mais recentes; só reordena se vier alguma data anterior
+    if not novos.empty and not df.empty and novos['data'].min() < df['data'].iloc[-1]:
+        juntos = juntos.sort_values('data', kind='stable', ignore_index=True)
+    return juntos
+
+
+# Posição logo após a última quebra de linha (fim da última linha completa), lendo o arquivo de
+# trás para frente em trechos
+def _fim_ultima_linha(arquivo, tamanho):
+    posicao = tamanho
+    while posicao > 0:
+        inicio = max(0, posicao - TAMANHO_ANCORA)
+        arquivo.seek(inicio)
+        quebra = arquivo.read(posicao - inicio).rfind(b'\n')
+        if quebra >= 0:
+            return inicio + quebra + 1
+        posicao = inicio
+    return 0
+
+
+# Leitor dos primeiros bytes de um arquivo aberto, a partir da posição atual (a linha
+# incompleta do fim fica de fora sem copiar o conteúdo)
+class _TrechoInicial(io.RawIOBase):
+    def __init__(self, arquivo, tamanho):
+        self._arquivo = arquivo
+        self._restante = tamanho
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        tamanho = min(len(destino), self._restante)
+        if tamanho == 0:
+            return 0
+        lidos = self._arquivo.readinto(memoryview(destino)[:tamanho])
+        self._restante -= lidos
+        return lidos
+
+
+# Carregador de um CSV que cresce por anexação: lembra até qual byte já leu e, a cada
+# atualização, interpreta apenas as linhas novas. Truncamento ou reescrita do arquivo
+# provocam uma recarga completa.
+class CarregadorIncremental:
+    def __init__(self, caminho='arquivo_vendas.csv'):
+        self.caminho = caminho
+        self.df = None
+        self.cubo = None
+        self.offset = 0
+        self.linhas = 0
+        self.versao = 0
+        self.recargas = 0
+        self.incrementos = 0
+        self._cabecalho = b''
+        self._ancora = b''
+        self._mtime_ns = None
+        self.assinatura = None
+        self._estado = (None, None)
+        self._lock = threading.Lock()
+
+    # Chave que identifica o estado atual dos dados (muda a cada alteração)
+    @property
+    def chave(self):
+        return f'{self.caminho}:v{self.versao}'
+
+    def _ler_ancora(self, arquivo, offset):
+        inicio = max(len(self._cabecalho), offset - TAMANHO_ANCORA)
+        arquivo.seek(inicio)
+        return arquivo.read(offset - inicio)
+
+    def _publicar(self, df, cubo, offset, info, ancora):
+        self.df = df
+        self.cubo = cubo
+        self.offset = offset
+        self.linhas = len(df)
+        self._mtime_ns = info.st_mtime_ns
+        self._ancora = ancora
+        self._atualizar_assinatura(info)
+        self.versao += 1
+        df.attrs['chave'] = self.chave
+        # DataFrame e cubo publicados juntos, para leitores nunca verem versões misturadas
+        self._estado = (df, cubo)
+
+    # Assinatura da origem quando os dados cobrem o arquivo inteiro (None com uma linha incompleta no fim)
+    def _atualizar_assinatura(self, info):
+        self.assinatura = assinatura_origem(self.caminho, info) if self.offset == info.st_size else None
+
+    # Cubo correspondente à versão dos dados identificada pela chave (None se já mudou)
+    def cubo_para(self, chave):
+        df, cubo = self._estado
+        if df is not None and df.attrs.get('chave') == chave:
+            return cubo
+        return None
+
+    def _recarregar(self, arquivo, info):
+        # Só o cabeçalho e o fim do arquivo são lidos aqui: o conteúdo vem do Arrow ou é
+        # interpretado direto do arquivo aberto, sem uma cópia dos bytes em memória
+        fim = _fim_ultima_linha(arquivo, info.st_size)
+        arquivo.seek(0)
+        self._cabecalho = arquivo.readline() if fim else b''
+
+        # Arquivo completo e inalterado desde a última gravação colunar: usa o Arrow
+        if fim == info.st_size and colunar_atualizado(self.caminho):
+            df = ler_colunar(self.caminho)
+        else:
+            arquivo.seek(0)
+            df = ler_csv_vendas(io.BufferedReader(_TrechoInicial(arquivo, fim)))
+            if fim == info.st_size and pa is not None:
+                try:
+                    gravar_colunar(df, self.caminho, assinatura_origem(self.caminho, info))
+                except OSError:
+                    pass
+        self.recargas += 1
+        # O arquivo colunar guarda o layout completo (lido também pela análise); em memória fica o compacto
+        compacto = compactar_vendas(df, df.attrs.pop('bytes_lidos', None))
+        self._publicar(compacto, montar_cubo(df), fim, info, self._ler_ancora(arquivo, fim))
+
+    def _anexar(self, arquivo, info):
+        arquivo.seek(self.offset)
+        novos_bytes = arquivo.read(info.st_size - self.offset)
+        # A última linha pode estar sendo escrita: fica para a próxima atualização
+        fim = novos_bytes.rfind(b'\n') + 1
+        if fim == 0:
+            return
+        novos = ler_csv_vendas(io.BytesIO(self._cabecalho + novos_bytes[:fim]))
+        novos = compactar_vendas(novos, novos.attrs.pop('bytes_lidos'))
+        juntos = concatenar_vendas(self.df, novos)
+        # Relatório de memória somado: o trecho já carregado mais as linhas anexadas
+        memoria = self.df.attrs.get('memoria')
+        if memoria:
+            juntos.attrs['memoria'] = {
+                'bytes_antes': memoria['bytes_antes'] + novos.attrs['memoria']['bytes_antes'],
+                'bytes_depois': memoria_em_bytes(juntos),
+                'colunas_descartadas': memoria['colunas_descartadas'],
+            }
+        offset = self.offset + fim
+        self.incrementos += 1
+        self._publicar(
+            juntos,
+            combinar_cubos(self.cubo, montar_cubo(novos)),
+            offset,
+            info,
+            self._ler_ancora(arquivo, offset),
+        )
+
+    # Atualiza os dados com o conteúdo atual do arquivo e devolve o DataFrame
+    def atualizar(self):
+        with self._lock:
+            with open(self.caminho, 'rb') as arquivo:
+                info = os.fstat(arquivo.fileno())
+                if self.df is None or info.st_size < self.offset:
+                    self._recarregar(arquivo, info)
+                elif info.st_size == self.offset and info.st_mtime_ns != self._mtime_ns:
+                    # Mesmo tamanho com outra data de modificação: num arquivo que só recebe linhas
+                    # no fim, significa que ele foi reescrito
+                    self._recarregar(arquivo, info)
+                elif info.st_size > self.offset:
+                    # O trecho já lido precisa estar intacto; senão o arquivo foi reescrito
+                    arquivo.seek(0)
+                    cabecalho = arquivo.read(len(self._cabecalho))
+                    if cabecalho != self._cabecalho or self._ler_ancora(arquivo, self.offset) != self._ancora:
+                        self._recarregar(arquivo, info)
+                    else:
+                        self._anexar(arquivo, info)
+            return self.df
+
+
+# ═══ Carga de vários arquivos ═══
+
+EXTENSOES_SUPORTADAS = ('.csv', '.xlsx', '.xls')
+
+
+# Lista os arquivos de vendas de um diretório, em ordem de nome
+def listar_arquivos(diretorio):
+    return sorted(
+        os.path.join(diretorio, nome)
+        for nome in os.listdir(diretorio)
+        if nome.lower().endswith(EXTENSOES_SUPORTADAS)
+    )
+
+
+# Executado em um processo trabalhador: lê, valida e tipa um arquivo e já devolve o seu cubo
+# parcial. A fonte é um caminho ou um par (nome, conteúdo); erros voltam como mensagem.
+def _processar_fonte(fonte):
+    if isinstance(fonte, str):
+        nome = os.path.basename(fonte)
+    else:
+        nome, conteudo = fonte
+    try:
+        if isinstance(fonte, str):
+            with open(fonte, 'rb') as arquivo:
+                conteudo = arquivo.read()
+        df = processar_arquivo(conteudo, nome)
+        return df, montar_cubo(df), None
+    except Exception as e:
+        return None, None, str(e)
+
+
+# Rótulo de cada fonte nos resultados: o caminho completo, ou o nome do arquivo enviado. Nomes
+# repetidos (arquivos de pastas diferentes enviados juntos) recebem a posição no lote.
+def _rotulos(fontes):
+    rotulos = [fonte if isinstance(fonte, str) else fonte[0] for fonte in fontes]
+    repetidos = {rotulo for rotulo, vezes in Counter(rotulos).items() if vezes > 1}
+    return [
+        f'{rotulo} (#{posicao})' if rotulo in repetidos else rotulo
+        for posicao, rotulo in enumerate(rotulos, start=1)
+    ]
+
+
+# Resultado da carga de vários arquivos: dados juntos, cubo somado, erros por arquivo e arquivos
+# carregados (pelos rótulos de _rotulos: caminho completo ou nome enviado)
+class ResultadoLote:
+    def __init__(self, df, cubo, erros, arquivos):
+        self.df = df
+        self.cubo = cubo
+        self.erros = erros
+        self.arquivos = arquivos
+
+    # Faturamento e quantidade por produto, somados a partir dos cubos parciais
+    def por_produto(self):
+        return self.cubo.groupby('produto', observed=True)[['faturamento', 'quantidade']].sum().reset_index()
+
+
+# Lê vários arquivos em paralelo (um processo por núcleo). Um arquivo inválido não
+# interrompe o lote: a mensagem fica em ResultadoLote.erros e os demais são carregados.
+# Com progresso, cada arquivo concluído é informado.
+def carregar_varios(fontes, max_processos=None, progresso=None):
+    fontes = list(fontes)
+    max_processos = min(len(fontes), max_processos or os.cpu_count() or 1)
+    resultados = [None] * len(fontes)
+
+    def concluir(posicao, resultado):
+        resultados[posicao] = resultado
+        if progresso is not None:
+            concluidos = sum(r is not None for r in resultados)
+            progresso(concluidos / len(fontes), f"{concluidos} de {len(fontes)} arquivos lidos")
+
+    if max_processos <= 1:
+        for posicao, fonte in enumerate(fontes):
+            concluir(posicao, _processar_fonte(fonte))
+    else:
+        # spawn: o processo principal pode ter threads (Streamlit), o que torna fork inseguro
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_processos, mp_context=contexto) as executor:
+            futuros = {executor.submit(_processar_fonte, fonte): posicao for posicao, fonte in enumerate(fontes)}
+            for futuro in as_completed(futuros):
+                concluir(futuros[futuro], futuro.result())
+
+    rotulos = _rotulos(fontes)
+    erros = {rotulo: erro for rotulo, (_, _, erro) in zip(rotulos, resultados) if erro is not None}
+    validos = [(rotulo, df, cubo) for rotulo, (df, cubo, erro) in zip(rotulos, resultados) if erro is None]
+    if not validos:
+        return ResultadoLote(pd.DataFrame(), pd.DataFrame(), erros, [])
+
+    df = pd.concat([df for _, df, _ in validos], ignore_index=True)
+    df['produto'] = df['produto'].astype('category')
+    df = df.sort_values('data', kind='stable', ignore_index=True)
+    cubo = combinar_cubos(*(cubo for _, _, cubo in validos))
+    return ResultadoLote(df, cubo, erros, [nome for nome, _, _ in validos])
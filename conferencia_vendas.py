@@ -0,0 +1,119 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from agregados_vendas import (
+    SomasAcumuladas,
+    calcular_kpis,
+    faturamento_diario,
+    faturamento_por_modelo,
+    filtrar_cubo,
+    montar_cubo,
+    serie_evolucao,
+)
+from arquivo_vendas import gerar_blocos
+from carregamento_vendas import carregar_vendas
+from memoria_vendas import compactar_vendas
+
+# Confere as consultas pelas somas acumuladas (KPIs, ranking, top k e séries por dia, semana e
+# mês) contra os mesmos cálculos sobre o recorte do cubo, em períodos e modelos sorteados
+
+
+# Dados sorteados com o gerador de arquivo_vendas.py, sem alguns dias (para conferir os períodos vazios)
+def gerar_dados(dias, vendas_por_dia, produtos, semente):
+    df = pd.concat(gerar_blocos(dias, vendas_por_dia, produtos, semente), ignore_index=True)
+    df['data'] = pd.to_datetime(df['data'], format='%d/%m/%Y')
+    rng = np.random.default_rng(semente)
+    sem_vendas = rng.choice(df['data'].unique(), size=dias // 5, replace=False)
+    return compactar_vendas(df[~df['data'].isin(sem_vendas)].reset_index(drop=True))
+
+
+# Diferenças entre as duas formas de cálculo para um recorte (lista vazia se iguais)
+def conferir_recorte(cubo, somas, inicio, fim, modelos, k, max_pontos):
+    diferencas = []
+    recorte = filtrar_cubo(cubo, inicio, fim, modelos or list(somas.produtos))
+
+    esperado, obtido = calcular_kpis(recorte), somas.kpis(inicio, fim, modelos)
+    for nome in ('quantidade', 'faturamento', 'ticket_medio', 'modelos'):
+        a, b = esperado[nome], obtido[nome]
+        if not (np.isnan(a) and np.isnan(b)) and not np.isclose(a, b, rtol=0, atol=0.005):
+            diferencas.append(f"kpis[{nome}]: {a} != {b}")
+
+    esperado = faturamento_por_modelo(recorte).reset_index(drop=True)
+    obtido = somas.ranking(inicio, fim, modelos)
+    if list(esperado['produto'].astype(str)) != list(obtido['produto'].astype(str)):
+        diferencas.append("ranking: ordem dos produtos")
+    elif not np.allclose(esperado['faturamento'], obtido['faturamento'], rtol=0, atol=0.005):
+        diferencas.append("ranking: faturamento")
+    top = somas.ranking(inicio, fim, modelos, k=k)
+    if list(top['produto'].astype(str)) != list(esperado['produto'].astype(str))[:k]:
+        diferencas.append(f"ranking: top {k}")
+
+    diario = faturamento_diario(recorte)
+    for periodo in (None, 'dia', 'semana', 'mês'):
+        serie_cubo, periodo_cubo = serie_evolucao(diario, max_pontos, periodo=periodo)
+        serie_somas, periodo_somas = somas.serie(inicio, fim, modelos, periodo, max_pontos)
+        # Na escolha automática o cubo mede o intervalo dos dias com vendas do recorte, e as somas
+        # o intervalo pedido: o período escolhido pode diferir, e aí as séries não se comparam
+        if periodo is None and periodo_cubo != periodo_somas:
+            continue
+        if (
+            periodo_cubo != periodo_somas
+            or len(serie_cubo) != len(serie_somas)
+            or not (serie_cubo['data'].to_numpy() == serie_somas['data'].to_numpy()).all()
+            or not np.allclose(serie_cubo['faturamento'], serie_somas['faturamento'], rtol=0, atol=0.005)
+        ):
+            diferencas.append(f"serie[{periodo or 'automática'}]")
+    return diferencas
+
+
+def conferir(cubo, consultas, semente, max_pontos=50):
+    somas = SomasAcumuladas(cubo)
+    rng = np.random.default_rng(semente)
+    produtos = list(somas.produtos)
+    dias = somas.dias
+    falhas = []
+    for numero in range(consultas):
+        a, b = sorted(rng.integers(0, len(dias), 2))
+        # Início às vezes antes do primeiro dia com vendas do intervalo
+        inicio = dias[a] - pd.Timedelta(days=int(rng.integers(0, 3)))
+        fim = dias[b]
+        modelos = None
+        if rng.random() < 0.7:
+            modelos = list(rng.choice(produtos, int(rng.integers(1, len(produtos) + 1)), replace=False))
+        k = int(rng.integers(1, len(produtos) + 1))
+        for diferenca in conferir_recorte(cubo, somas, inicio, fim, modelos, k, max_pontos):
+            falhas.append(f"consulta {numero} ({inicio:%Y-%m-%d} a {fim:%Y-%m-%d}, {modelos or 'todos'}): {diferenca}")
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Confere as somas acumuladas contra o recorte do cubo em períodos e modelos sorteados.'
+    )
+    parser.add_argument('--arquivo', help='Arquivo de vendas a usar (padrão: dados sorteados)')
+    parser.add_argument('--dias', type=int, default=730, help='Dias dos dados sorteados')
+    parser.add_argument('--vendas-por-dia', type=int, default=40, help='Vendas por dia dos dados sorteados')
+    parser.add_argument('--produtos', type=int, default=12, help='Produtos dos dados sorteados')
+    parser.add_argument('--consultas', type=int, default=300, help='Recortes sorteados')
+    parser.add_argument('--semente', type=int, default=0, help='Semente dos sorteios')
+    args = parser.parse_args()
+
+    if args.arquivo:
+        df = carregar_vendas(args.arquivo)
+    else:
+        df = gerar_dados(args.dias, args.vendas_por_dia, args.produtos, args.semente)
+    falhas = conferir(montar_cubo(df), args.consultas, args.semente)
+
+    if falhas:
+        print(f"{len(falhas)} divergências em {args.consultas} consultas:")
+        for falha in falhas[:20]:
+            print(f"- {falha}")
+        sys.exit(1)
+    print(f"{args.consultas} consultas conferidas: somas acumuladas iguais ao recorte do cubo.")
+
+
+if __name__ == '__main__':
+    main()
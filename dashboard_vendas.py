@@ -1,9 +1,44 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
-import time
+import io
+import os
+import uuid
+
+from agregados_vendas import (
+    IndiceVendas,
+    VisaoTabela,
+    calcular_kpis,
+    faturamento_diario,
+    faturamento_por_modelo,
+    filtrar_cubo,
+    montar_cubo,
+    serie_evolucao,
+)
+from armazem_vendas import ArmazemAgregados
+from cache_vendas import CacheLRU, RegistroDatasets, chave_conteudo
+from carregamento_vendas import (
+    COLUNAS_OBRIGATORIAS,
+    FORMATOS_DATA,
+    CarregadorIncremental,
+    carregar_varios,
+    processar_arquivo,
+)
+from analise_vendas import exportar_dados
+from diagnostico_vendas import ARQUIVO_LOG, Diagnostico, gravar_log
+from estilo_vendas import BARRA_FILTROS, CSS_DASHBOARD, SECAO_EXPORTAR, SECAO_FONTE_DADOS
+from excel_vendas import FORMATOS_EXPORTACAO
+from formatacao_vendas import FORMATO_MOEDA_TABELA, formatar_moeda
+from graficos_vendas import figura_evolucao, figura_pizza, figura_ranking
+from memoria_vendas import colunas_em_reais, memoria_em_bytes, valores_em_reais
+
+# Os conjuntos de dados são compartilhados entre as sessões e nunca alterados no lugar: com o
+# copy-on-write (padrão a partir do pandas 3), recortes e colunas derivadas não copiam os dados
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# Medições desta execução do script (exibidas e gravadas só no modo diagnóstico)
+diagnostico = Diagnostico()
 
 # Configuração da página
 st.set_page_config(
@@ -12,101 +47,25 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Função para formatar valores em reais sem depender do locale
-def format_currency(value):
-    return f"R$ {value:,.2f}"
+# Opções de linhas por página da tabela de dados brutos
+LINHAS_POR_PAGINA = [50, 100, 500, 1000]
+
+# Granularidade do gráfico de evolução (Automática: o menor período que caiba no limite de pontos)
+GRANULARIDADES = {'Automática': None, 'Dia': 'dia', 'Semana': 'semana', 'Mês': 'mês'}
+
+# Modelos exibidos no gráfico de ranking (0 = todos)
+OPCOES_TOP_MODELOS = [0, 3, 5, 10]
+
+# Formatação das colunas da tabela de dados brutos
+COLUNAS_DADOS_BRUTOS = {
+    'data': st.column_config.DateColumn(format='DD/MM/YYYY'),
+    'quantidade': st.column_config.NumberColumn(format='%,d'),
+    'preco_unitario': st.column_config.NumberColumn(format=FORMATO_MOEDA_TABELA),
+    'faturamento': st.column_config.NumberColumn(format=FORMATO_MOEDA_TABELA),
+}
 
 # CSS personalizado
-st.markdown("""
-<style>
-    /* === KPI Cards === */
-    .card {
-        padding: 15px;
-        border-radius: 10px;
-        margin: 5px;
-        min-height: 100px;
-        height: auto;
-        display: flex;
-        flex-direction: column;
-        justify-content: center;
-        box-sizing: border-box;
-        width: 100%;
-    }
-    .card-title {
-        font-size: 0.85em;
-        color: rgba(255,255,255,0.8);
-        margin-bottom: 8px;
-        line-height: 1.2;
-    }
-    .card-value {
-        font-size: 1.3em;
-        font-weight: bold;
-        color: white;
-        overflow: hidden;
-        text-overflow: ellipsis;
-        line-height: 1.2;
-    }
-    @media (max-width: 1200px) {
-        .card-value { font-size: 1.1em; }
-    }
-    @media (max-width: 992px) {
-        .card { padding: 10px; }
-        .card-title { font-size: 0.8em; }
-        .card-value { font-size: 1em; }
-    }
-    .card-blue { background: linear-gradient(135deg, #6B7FD7 0%, #8662DD 100%); }
-    .card-green { background: linear-gradient(135deg, #4CAF50 0%, #45B649 100%); }
-    .card-orange { background: linear-gradient(135deg, #FF8C42 0%, #F7A440 100%); }
-    .card-red { background: linear-gradient(135deg, #FF6B6B 0%, #FF4949 100%); }
-
-    /* === Sidebar Sections === */
-    .sidebar-section {
-        background: rgba(255,255,255,0.04);
-        border: 1px solid rgba(255,255,255,0.08);
-        border-radius: 10px;
-        padding: 16px 14px 12px;
-        margin-bottom: 12px;
-    }
-    .sidebar-header {
-        display: flex;
-        align-items: center;
-        gap: 8px;
-        margin-bottom: 12px;
-        padding-bottom: 8px;
-        border-bottom: 1px solid rgba(255,255,255,0.06);
-    }
-    .sidebar-header svg {
-        flex-shrink: 0;
-        opacity: 0.7;
-    }
-    .sidebar-header span {
-        font-size: 0.78em;
-        font-weight: 600;
-        text-transform: uppercase;
-        letter-spacing: 1.2px;
-        opacity: 0.6;
-    }
-    /* === Filtros inline === */
-    .filter-bar {
-        background: rgba(255,255,255,0.04);
-        border: 1px solid rgba(255,255,255,0.08);
-        border-radius: 10px;
-        padding: 14px 18px;
-        margin: 10px 0 20px;
-    }
-    .filter-label {
-        display: flex;
-        align-items: center;
-        gap: 6px;
-        font-size: 0.75em;
-        font-weight: 600;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-        opacity: 0.5;
-        margin-bottom: 6px;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(CSS_DASHBOARD, unsafe_allow_html=True)
 
 # Função para criar um card personalizado
 def create_metric_card(title, value, color):
@@ -118,131 +77,263 @@ def create_metric_card(title, value, color):
     </div>
     """
 
-# Colunas obrigatórias para o dashboard
-COLUNAS_OBRIGATORIAS = ['data', 'produto', 'quantidade', 'preco_unitario']
+# Carregador incremental do arquivo padrão, compartilhado entre as sessões
+@st.cache_resource
+def get_carregador_padrao():
+    return CarregadorIncremental('arquivo_vendas.csv')
+
+# Agregados materializados (totais por produto e por dia) de cada conjunto de dados, calculados
+# em segundo plano logo após a carga e compartilhados entre as sessões
+@st.cache_resource
+def get_armazem_agregados():
+    return ArmazemAgregados()
 
-# Função para carregar os dados do arquivo padrão
-@st.cache_data
+# Função para carregar os dados do arquivo padrão (interpreta só as linhas anexadas desde a última carga)
 def load_default_data():
     try:
-        df = pd.read_csv('arquivo_vendas.csv')
-        df['faturamento'] = df['quantidade'] * df['preco_unitario']
-        df['data'] = pd.to_datetime(df['data'], format='%d/%m/%Y')
+        carregador = get_carregador_padrao()
+        versao = carregador.versao
+        df = carregador.atualizar()
+        diagnostico.registrar_cache('arquivo_padrao', versao > 0 and carregador.versao == versao)
+        # Os agregados do arquivo padrão também ficam gravados ao lado dele (usados pela análise)
+        chave = df.attrs.get('chave')
+        get_armazem_agregados().agendar(
+            chave, df=df, cubo=carregador.cubo_para(chave),
+            caminho=carregador.caminho, assinatura=carregador.assinatura
+        )
         return df
     except Exception:
         return pd.DataFrame()
 
-# Função para processar o arquivo enviado pelo usuário
-def load_uploaded_data(uploaded_file):
-    try:
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(uploaded_file)
-        else:
-            st.error("Formato não suportado. Envie um arquivo CSV ou Excel (.xlsx/.xls).")
-            return pd.DataFrame()
-
-        # Normalizar nomes das colunas (minúsculo, sem espaços extras)
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-
-        # Verificar colunas obrigatórias
-        colunas_faltando = [col for col in COLUNAS_OBRIGATORIAS if col not in df.columns]
-        if colunas_faltando:
-            st.error(
-                f"⚠️ Colunas obrigatórias não encontradas: **{', '.join(colunas_faltando)}**\n\n"
-                f"Seu arquivo precisa ter as colunas: `data`, `produto`, `quantidade`, `preco_unitario`"
-            )
-            return pd.DataFrame()
-
-        # Converter tipos
-        df['quantidade'] = pd.to_numeric(df['quantidade'], errors='coerce')
-        df['preco_unitario'] = pd.to_numeric(df['preco_unitario'], errors='coerce')
-        df = df.dropna(subset=['quantidade', 'preco_unitario'])
-
-        df['faturamento'] = df['quantidade'] * df['preco_unitario']
-
-        # Tentar múltiplos formatos de data
-        for fmt in ['%d/%m/%Y', '%Y-%m-%d', '%m/%d/%Y', '%d-%m-%Y']:
-            try:
-                df['data'] = pd.to_datetime(df['data'], format=fmt)
-                break
-            except (ValueError, TypeError):
-                continue
-        else:
-            df['data'] = pd.to_datetime(df['data'], dayfirst=True, errors='coerce')
+# Barra de progresso da leitura na barra lateral, criada só se a leitura informar progresso
+# (arquivos pequenos são lidos de uma vez, sem barra)
+class ProgressoCarga:
+    def __init__(self):
+        self.barra = None
 
-        df = df.dropna(subset=['data'])
+    def __call__(self, fracao, texto):
+        if self.barra is None:
+            self.barra = st.sidebar.progress(0.0, text=texto)
+        self.barra.progress(min(max(fracao, 0.0), 1.0), text=texto)
 
-        if df.empty:
-            st.error("Nenhum dado válido encontrado após o processamento.")
-            return pd.DataFrame()
+    def encerrar(self):
+        if self.barra is not None:
+            self.barra.empty()
+
+# Registro dos arquivos enviados já processados, compartilhado entre as sessões: uma única cópia
+# por conteúdo, mantida enquanto alguma sessão a usa e removida após 10 minutos sem uso
+@st.cache_resource
+def get_registro_datasets():
+    return RegistroDatasets(max_bytes=1024 ** 3, tempo_ocioso=600, tempo_sessao=1800)
+
+# Identificador da sessão do navegador (usado no registro de conjuntos e no log de diagnóstico)
+def id_sessao():
+    return st.session_state.setdefault('id_sessao', uuid.uuid4().hex)
 
+# Função para processar o arquivo enviado pelo usuário (compartilhado entre sessões pelo conteúdo)
+def load_uploaded_data(uploaded_file):
+    conteudo = uploaded_file.getvalue()
+    extensao = uploaded_file.name.rsplit('.', 1)[-1].lower()
+    chave = chave_conteudo(conteudo, extensao, COLUNAS_OBRIGATORIAS, FORMATOS_DATA)
+
+    registro = get_registro_datasets()
+    df = registro.adquirir(chave, id_sessao())
+    diagnostico.registrar_cache('uploads', df is not None)
+    if df is not None:
         return df
+
+    progresso = ProgressoCarga()
+    try:
+        df = processar_arquivo(conteudo, uploaded_file.name, progresso)
+    except ValueError as e:
+        st.error(str(e), icon="⚠️")
+        return pd.DataFrame()
     except Exception as e:
         st.error(f"Erro ao processar o arquivo: {e}")
         return pd.DataFrame()
+    finally:
+        progresso.encerrar()
+
+    df.attrs['chave'] = chave
+    return registro.publicar(chave, id_sessao(), df)
+
+# Função para processar vários arquivos enviados de uma vez, em paralelo (compartilhados pelo conteúdo)
+def load_uploaded_files(uploaded_files):
+    fontes = [(arquivo.name, arquivo.getvalue()) for arquivo in uploaded_files]
+    chaves = [chave_conteudo(conteudo, nome.rsplit('.', 1)[-1].lower()) for nome, conteudo in fontes]
+    chave = chave_conteudo(''.join(chaves).encode('utf-8'), COLUNAS_OBRIGATORIAS, FORMATOS_DATA)
+
+    registro = get_registro_datasets()
+    df = registro.adquirir(chave, id_sessao())
+    diagnostico.registrar_cache('uploads', df is not None)
+    if df is None:
+        progresso = ProgressoCarga()
+        try:
+            resultado = carregar_varios(fontes, progresso=progresso)
+        finally:
+            progresso.encerrar()
+        df = resultado.df
+        if df.empty:
+            st.error("Nenhum dos arquivos enviados pôde ser carregado.")
+        else:
+            df.attrs['chave'] = chave
+            df.attrs['erros_arquivos'] = resultado.erros
+            df = registro.publicar(chave, id_sessao(), df)
+        erros = resultado.erros
+    else:
+        erros = df.attrs.get('erros_arquivos', {})
+
+    # Erros por arquivo: um arquivo inválido não impede a carga dos demais
+    for nome, erro in erros.items():
+        st.sidebar.warning(f"**{nome}**: {erro}")
+    return df
+
+# Cubo de agregados (dia × produto), calculado uma vez por conjunto de dados e compartilhado
+# entre as sessões sem cópia (somente leitura)
+@st.cache_resource(max_entries=16)
+def get_cubo(chave_dataset, _df):
+    diagnostico.registrar_falha('cubo')
+    return montar_cubo(_df)
+
+# Índice de filtragem (datas ordenadas e códigos de produto), mantido sem cópia por conjunto de dados
+@st.cache_resource(max_entries=16)
+def get_indice(chave_dataset, _df):
+    diagnostico.registrar_falha('indice')
+    return IndiceVendas(_df)
+
+# Busca e ordenação das linhas brutas (posições), calculadas uma vez por conjunto de dados, filtros,
+# busca, coluna e sentido: trocar de página ou mexer em outros widgets não ordena de novo. O cache
+# (de todas as sessões) guarda só as posições; o recorte filtrado é passado a cada página.
+@st.cache_resource(max_entries=4)
+def get_visao_tabela(chave_dataset, chave_filtros, busca, coluna, decrescente, _df):
+    diagnostico.registrar_falha('visao_tabela')
+    return VisaoTabela(_df, busca, coluna, decrescente)
+
+# Arquivos de exportação já gerados, por conjunto de dados, filtros e formato (compartilhado entre sessões)
+@st.cache_resource
+def get_cache_exportacoes():
+    return CacheLRU(max_itens=8, max_bytes=512 * 1024 ** 2)
+
+# Gera o arquivo de exportação em blocos, direto no formato final (ou reaproveita o já gerado).
+# Executada só quando o usuário clica em Download, fora da execução do script.
+def gerar_exportacao(cache, chave, df, formato):
+    conteudo = cache.get(chave)
+    if conteudo is None:
+        destino = io.BytesIO()
+        exportar_dados(df, f'vendas_veiculos{FORMATOS_EXPORTACAO[formato][0]}', destino)
+        conteudo = destino.getvalue()
+        cache.put(chave, conteudo)
+    return conteudo
+
+# Nova busca, ordenação ou tamanho de página recomeça a tabela de dados brutos da primeira página
+def voltar_primeira_pagina():
+    st.session_state['pagina_brutos'] = 1
+
+# Modo diagnóstico: tabela com o tempo e as linhas de cada etapa desta execução e registro no log
+# (ativado na barra lateral ou, por padrão, com a variável de ambiente DIAGNOSTICO_VENDAS=1)
+def finalizar_diagnostico(linhas):
+    ativo = st.sidebar.toggle(
+        "Modo diagnóstico",
+        value=os.environ.get('DIAGNOSTICO_VENDAS') == '1',
+        key='modo_diagnostico',
+        help="Mede cada etapa da execução e grava os tempos no log de diagnóstico"
+    )
+    if not ativo:
+        return
+
+    sessao = id_sessao()
+    execucao = st.session_state['execucoes_diagnostico'] = st.session_state.get('execucoes_diagnostico', 0) + 1
+    registro = diagnostico.registro(sessao, execucao, linhas=linhas)
+    gravar_log(registro, os.environ.get('DIAGNOSTICO_VENDAS_LOG', ARQUIVO_LOG))
+
+    with st.expander(f"🩺 Diagnóstico da execução ({registro['total_segundos']:.3f} s)"):
+        st.dataframe(diagnostico.tabela(), hide_index=True, use_container_width=True)
+        caches = ' · '.join(
+            f"{nome}: {contagem['acertos']} acerto(s), {contagem['falhas']} falha(s)"
+            for nome, contagem in diagnostico.caches.items()
+        )
+        st.caption(f"Caches: {caches or 'nenhum consultado'}")
 
 # Título do Dashboard
 st.title("📊 Dashboard de Vendas de Veículos")
 
 # ═══ SIDEBAR ═══
-# Ícones SVG (estilo Lucide/shadcn)
-ICON_UPLOAD = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M21 15v4a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2v-4"/><polyline points="17 8 12 3 7 8"/><line x1="12" y1="3" x2="12" y2="15"/></svg>'
-ICON_FILTER = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><polygon points="22 3 2 3 10 12.46 10 19 14 21 14 12.46 22 3"/></svg>'
-ICON_CALENDAR = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><rect x="3" y="4" width="18" height="18" rx="2" ry="2"/><line x1="16" y1="2" x2="16" y2="6"/><line x1="8" y1="2" x2="8" y2="6"/><line x1="3" y1="10" x2="21" y2="10"/></svg>'
-ICON_CAR = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M19 17h2c.6 0 1-.4 1-1v-3c0-.9-.7-1.7-1.5-1.9L18 10l-3-5H9L6 10l-2.5 1.1C2.7 11.3 2 12.1 2 13v3c0 .6.4 1 1 1h2"/><circle cx="7" cy="17" r="2"/><circle cx="17" cy="17" r="2"/></svg>'
-ICON_DOWNLOAD = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M21 15v4a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2v-4"/><polyline points="7 10 12 15 17 10"/><line x1="12" y1="15" x2="12" y2="3"/></svg>'
-
 # Seção: Upload
-st.sidebar.markdown(f'<div class="sidebar-section"><div class="sidebar-header">{ICON_UPLOAD}<span>Fonte de Dados</span></div>', unsafe_allow_html=True)
-uploaded_file = st.sidebar.file_uploader(
+st.sidebar.markdown(SECAO_FONTE_DADOS, unsafe_allow_html=True)
+uploaded_files = st.sidebar.file_uploader(
     "Envie sua planilha",
     type=['csv', 'xlsx', 'xls'],
-    help="Colunas: data, produto, quantidade, preco_unitario",
-    label_visibility="collapsed"
+    help="Colunas: data, produto, quantidade, preco_unitario. Vários arquivos são somados.",
+    label_visibility="collapsed",
+    accept_multiple_files=True
 )
+if uploaded_files:
+    stats_registro = get_registro_datasets().stats()
+    st.sidebar.caption(
+        f"Arquivos compartilhados: {stats_registro['itens']} em memória "
+        f"({stats_registro['bytes'] / 1024 ** 2:,.1f} MB) · {stats_registro['sessoes']} sessões · "
+        f"{stats_registro['acertos']} acertos · {stats_registro['falhas']} falhas"
+    )
 
 # Botão limpar dados
 if st.sidebar.button("Limpar Dados", use_container_width=True, type="secondary"):
-    st.cache_data.clear()
+    get_registro_datasets().liberar(id_sessao())
     st.session_state['dados_limpos'] = True
-    st.toast("Dados limpos com sucesso!")
-    time.sleep(0.5)
+    st.session_state['avisar_limpeza'] = True
     st.rerun()
 st.sidebar.markdown('</div>', unsafe_allow_html=True)
+if st.session_state.pop('avisar_limpeza', False):
+    st.toast("Dados limpos com sucesso!")
 
 # Carregar dados
 if st.session_state.get('dados_limpos', False):
     df = pd.DataFrame()
-    if uploaded_file is None:
+    if not uploaded_files:
         st.session_state['dados_limpos'] = False
-elif uploaded_file is not None:
-    df = load_uploaded_data(uploaded_file)
-    if not df.empty and st.session_state.get('ultimo_arquivo') != uploaded_file.name:
-        st.session_state['ultimo_arquivo'] = uploaded_file.name
-        # Barra de progresso com efeito
-        progress_bar = st.sidebar.progress(0, text="Carregando dados...")
-        for i in range(100):
-            time.sleep(0.01)
-            progress_bar.progress(i + 1, text="Carregando dados...")
-        progress_bar.empty()
+elif uploaded_files:
+    with diagnostico.etapa('carregamento') as etapa:
+        if len(uploaded_files) == 1:
+            df = load_uploaded_data(uploaded_files[0])
+        else:
+            df = load_uploaded_files(uploaded_files)
+        etapa['linhas_saida'] = len(df)
+    nomes_arquivos = ', '.join(arquivo.name for arquivo in uploaded_files)
+    if not df.empty and st.session_state.get('ultimo_arquivo') != nomes_arquivos:
+        st.session_state['ultimo_arquivo'] = nomes_arquivos
         st.toast(f"{len(df)} registros carregados com sucesso!")
+
+    # Resumo das linhas descartadas ou convertidas fora do formato de data detectado
+    carga = df.attrs.get('carga', {})
+    descartadas = carga.get('descartadas_numericas', 0) + carga.get('descartadas_data', 0)
+    if descartadas or carga.get('datas_inferidas'):
+        st.sidebar.caption(
+            f"{descartadas} linhas descartadas (valores inválidos: {carga['descartadas_numericas']}, "
+            f"datas inválidas: {carga['descartadas_data']}) · {carga['datas_inferidas']} datas "
+            f"fora do formato {carga['formato_data'] or 'detectado'}"
+        )
 else:
-    df = load_default_data()
+    # Sem arquivos enviados, a sessão deixa de usar o conjunto que tinha no registro
+    get_registro_datasets().liberar(id_sessao())
+    with diagnostico.etapa('carregamento') as etapa:
+        df = load_default_data()
+        etapa['linhas_saida'] = len(df)
 
-# Seção: Exportar
+# Memória ocupada pelos dados carregados (representação compacta: categorias, inteiros mínimos, centavos)
 if not df.empty:
-    st.sidebar.markdown(f'<div class="sidebar-section"><div class="sidebar-header">{ICON_DOWNLOAD}<span>Exportar</span></div>', unsafe_allow_html=True)
-    csv = df.to_csv(index=False).encode('utf-8')
-    st.sidebar.download_button(
-        label="Download CSV",
-        data=csv,
-        file_name="vendas_veiculos.csv",
-        mime="text/csv",
-        use_container_width=True
-    )
-    st.sidebar.markdown('</div>', unsafe_allow_html=True)
+    memoria = df.attrs.get('memoria')
+    if memoria:
+        descartadas = len(memoria['colunas_descartadas'])
+        st.sidebar.caption(
+            f"Memória dos dados: {memoria['bytes_antes'] / 1024 ** 2:,.1f} MB → "
+            f"{memoria['bytes_depois'] / 1024 ** 2:,.1f} MB "
+            f"({memoria['bytes_antes'] / max(memoria['bytes_depois'], 1):.1f}× menor)"
+            + (f" · {descartadas} colunas extras descartadas" if descartadas else "")
+        )
+    else:
+        st.sidebar.caption(f"Memória dos dados: {memoria_em_bytes(df) / 1024 ** 2:,.1f} MB")
+
+# Seção: Exportar (preenchida depois dos filtros, para poder exportar a visão filtrada)
+secao_exportar = st.sidebar.container()
 
 # Verificar se temos dados
 if df.empty:
@@ -255,16 +346,34 @@ if df.empty:
         "- `quantidade` — quantidade vendida\n"
         "- `preco_unitario` — preço unitário"
     )
+    finalizar_diagnostico(0)
     st.stop()
 
 # Container para KPIs (aparece primeiro visualmente)
 kpi_container = st.container()
 
 # Filtros abaixo dos KPIs
-st.markdown(f'<div class="filter-bar"><div class="filter-label">{ICON_FILTER} Filtros</div></div>', unsafe_allow_html=True)
-
-min_date = df['data'].min().date() if not df.empty else datetime.now().date()
-max_date = df['data'].max().date() if not df.empty else datetime.now().date()
+st.markdown(BARRA_FILTROS, unsafe_allow_html=True)
+
+# KPIs e gráficos são respondidos pelo cubo de agregados, sem varrer as linhas brutas
+with diagnostico.etapa('cubo', len(df)) as etapa:
+    cubo = None
+    if not uploaded_files:
+        # Arquivo padrão: o carregador incremental já mantém o cubo atualizado
+        cubo = get_carregador_padrao().cubo_para(df.attrs.get('chave'))
+        if cubo is not None:
+            diagnostico.registrar_cache('cubo', True)
+    if cubo is None:
+        cubo = diagnostico.consultar_cache('cubo', get_cubo, df.attrs.get('chave'), df)
+    etapa['linhas_saida'] = len(cubo)
+
+# Arquivos enviados: agregados materializados em segundo plano a partir do cubo já montado
+# (o arquivo padrão é agendado pelo próprio carregamento)
+if uploaded_files:
+    get_armazem_agregados().agendar(df.attrs['chave'], cubo=cubo)
+
+min_date = cubo['dia'].min().date() if not cubo.empty else datetime.now().date()
+max_date = cubo['dia'].max().date() if not cubo.empty else datetime.now().date()
 
 fcol1, fcol2, fcol3, fcol4 = st.columns([1, 1, 3, 1])
 with fcol1:
@@ -272,7 +381,7 @@ with fcol1:
 with fcol2:
     data_fim = st.date_input("📅 Até", max_date)
 with fcol3:
-    produtos_disponiveis = df['produto'].unique() if not df.empty else []
+    produtos_disponiveis = cubo['produto'].unique() if not cubo.empty else []
     modelos = st.multiselect(
         "🚗 Modelos",
         options=produtos_disponiveis,
@@ -284,14 +393,68 @@ with fcol4:
     st.markdown(f"<br><span style='opacity:0.5; font-size:0.85em'>{total_selecionados}/{total_disponiveis} modelos</span>", unsafe_allow_html=True)
 
 # Aplicar filtros ao DataFrame
-if not df.empty and modelos:
-    df_filtered = df[
-        (df['data'].dt.date >= data_inicio) & 
-        (df['data'].dt.date <= data_fim) & 
-        (df['produto'].isin(modelos))
-    ]
-else:
-    df_filtered = df.copy()
+with diagnostico.etapa('filtro', len(df)) as etapa:
+    if not df.empty and modelos:
+        indice = diagnostico.consultar_cache('indice', get_indice, df.attrs.get('chave'), df)
+        df_filtered = indice.filtrar(df, data_inicio, data_fim, modelos)
+        chave_filtros = (str(data_inicio), str(data_fim), tuple(modelos))
+    else:
+        # Sem modelos selecionados, mostra tudo: o próprio conjunto compartilhado, sem cópia
+        df_filtered = df
+        chave_filtros = None
+    etapa['linhas_saida'] = len(df_filtered)
+
+# Exportação sob demanda: o arquivo só é gerado no clique, e fica em cache por dados, filtros e formato
+with secao_exportar:
+    st.markdown(SECAO_EXPORTAR, unsafe_allow_html=True)
+    escopo = st.radio("Dados", ["Filtrados", "Todos"], horizontal=True, key='escopo_exportacao')
+    formato = st.selectbox("Formato", list(FORMATOS_EXPORTACAO), key='formato_exportacao')
+    if escopo == "Filtrados":
+        df_exportar = df_filtered
+        chave_exportacao = (df.attrs.get('chave'), chave_filtros, formato)
+    else:
+        df_exportar = df
+        chave_exportacao = (df.attrs.get('chave'), formato)
+    extensao, mime = FORMATOS_EXPORTACAO[formato]
+    cache_exportacoes = get_cache_exportacoes()
+    st.download_button(
+        label=f"Download {formato}",
+        data=lambda: gerar_exportacao(cache_exportacoes, chave_exportacao, df_exportar, formato),
+        file_name=f"vendas_veiculos{extensao}",
+        mime=mime,
+        use_container_width=True
+    )
+    st.caption(f"{len(df_exportar):,} linhas")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# KPIs, faturamento por modelo (pizza, ranking e resumo) e série de evolução. Com os agregados
+# materializados prontos, vêm das somas acumuladas (custo constante para qualquer período);
+# até lá, do recorte do cubo. Sem modelos selecionados, vale tudo, como nas linhas brutas.
+periodo_escolhido = GRANULARIDADES[st.session_state.get('granularidade_serie', 'Automática')]
+top_modelos = st.session_state.get('top_modelos', 0) or None
+with diagnostico.etapa('agregacoes', len(cubo)) as etapa:
+    agregados = get_armazem_agregados().obter(df.attrs.get('chave'))
+    somas = agregados.somas if agregados is not None else None
+    diagnostico.registrar_cache('agregados', somas is not None)
+    if somas is not None:
+        inicio_recorte, fim_recorte = (data_inicio, data_fim) if modelos else (min_date, max_date)
+        kpis = somas.kpis(inicio_recorte, fim_recorte, modelos)
+        faturamento_modelo = somas.ranking(inicio_recorte, fim_recorte, modelos)
+        # Só os k maiores, por seleção parcial
+        ranking_modelos = (
+            somas.ranking(inicio_recorte, fim_recorte, modelos, k=top_modelos) if top_modelos else faturamento_modelo
+        )
+        serie_dia, periodo_serie = somas.serie(inicio_recorte, fim_recorte, modelos, periodo_escolhido)
+        dias_serie = somas.dias_no_intervalo(inicio_recorte, fim_recorte)
+    else:
+        cubo_filtrado = filtrar_cubo(cubo, data_inicio, data_fim, modelos) if modelos else cubo
+        kpis = calcular_kpis(cubo_filtrado)
+        faturamento_modelo = faturamento_por_modelo(cubo_filtrado)
+        ranking_modelos = faturamento_modelo.head(top_modelos) if top_modelos else faturamento_modelo
+        faturamento_dia = faturamento_diario(cubo_filtrado)
+        serie_dia, periodo_serie = serie_evolucao(faturamento_dia, periodo=periodo_escolhido)
+        dias_serie = len(faturamento_dia)
+    etapa['linhas_saida'] = len(faturamento_modelo) + len(serie_dia)
 
 # Renderizar KPIs no container (acima dos filtros)
 with kpi_container:
@@ -301,14 +464,14 @@ with kpi_container:
         st.markdown(
             create_metric_card(
                 "Total de Vendas",
-                f"{df_filtered['quantidade'].sum():,}",
+                f"{kpis['quantidade']:,}",
                 "blue"
             ),
             unsafe_allow_html=True
         )
 
     with col2:
-        faturamento_total = format_currency(df_filtered['faturamento'].sum())
+        faturamento_total = formatar_moeda(kpis['faturamento'])
         faturamento_total = faturamento_total.replace(" ", "")
         st.markdown(
             create_metric_card(
@@ -320,7 +483,7 @@ with kpi_container:
         )
 
     with col3:
-        ticket_medio = format_currency(df_filtered['faturamento'].mean())
+        ticket_medio = formatar_moeda(kpis['ticket_medio'])
         ticket_medio = ticket_medio.replace(" ", "")
         st.markdown(
             create_metric_card(
@@ -335,96 +498,112 @@ with kpi_container:
         st.markdown(
             create_metric_card(
                 "Total de Modelos",
-                f"{df_filtered['produto'].nunique()}",
+                f"{kpis['modelos']}",
                 "red"
             ),
             unsafe_allow_html=True
         )
 
-# Criando duas colunas para os gráficos
-col_left, col_right = st.columns(2)
-
-with col_left:
-    st.subheader("Evolução do Faturamento Diário")
-    faturamento_diario = df_filtered.groupby('data')['faturamento'].sum().reset_index()
-    fig_evolucao = px.line(
-        faturamento_diario,
-        x='data',
-        y='faturamento',
-        title="Faturamento ao Longo do Tempo",
-    )
-    fig_evolucao.update_layout(
-        yaxis_title="Faturamento (R$)",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        yaxis_gridcolor='rgba(128,128,128,0.1)',
-        xaxis_gridcolor='rgba(128,128,128,0.1)'
-    )
-    st.plotly_chart(fig_evolucao, use_container_width=True)
-
-with col_right:
-    st.subheader("Distribuição do Faturamento por Modelo")
-    faturamento_modelo = df_filtered.groupby('produto')['faturamento'].sum().reset_index()
-    fig_pizza = px.pie(
-        faturamento_modelo,
-        values='faturamento',
-        names='produto',
-        hole=0.6
-    )
-    fig_pizza.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
+# Montagem das figuras (Plotly) separada do envio ao navegador
+with diagnostico.etapa('figuras', len(serie_dia) + len(faturamento_modelo)):
+    fig_evolucao = figura_evolucao(serie_dia, periodo_serie)
+    fig_pizza = figura_pizza(faturamento_modelo)
+    fig_barras = figura_ranking(ranking_modelos)
+
+with diagnostico.etapa('graficos'):
+    # Criando duas colunas para os gráficos
+    col_left, col_right = st.columns(2)
+
+    with col_left:
+        st.subheader("Evolução do Faturamento Diário")
+        st.plotly_chart(fig_evolucao, use_container_width=True)
+        if periodo_serie != 'dia':
+            st.caption(
+                f"{dias_serie:,} dias agregados por {periodo_serie} ({len(serie_dia):,} pontos)"
+                + (" para manter o gráfico leve" if periodo_escolhido is None else "")
+            )
+        st.radio(
+            "Granularidade",
+            list(GRANULARIDADES),
+            key='granularidade_serie',
+            horizontal=True,
+            help="Automática: por dia, semana ou mês, o que mantiver o gráfico com até 500 pontos"
+        )
+
+    with col_right:
+        st.subheader("Distribuição do Faturamento por Modelo")
+        st.plotly_chart(fig_pizza, use_container_width=True)
+
+    # Ranking de Faturamento por Modelo
+    st.subheader("Ranking de Faturamento por Modelo")
+    st.selectbox(
+        "Modelos no ranking",
+        OPCOES_TOP_MODELOS,
+        format_func=lambda n: "Todos" if n == 0 else f"Top {n}",
+        key='top_modelos'
     )
-    st.plotly_chart(fig_pizza, use_container_width=True)
-
-# Ranking de Faturamento por Modelo
-st.subheader("Ranking de Faturamento por Modelo")
-faturamento_modelo = df_filtered.groupby('produto').agg({
-    'faturamento': 'sum',
-    'quantidade': 'sum'
-}).reset_index()
-
-faturamento_modelo = faturamento_modelo.sort_values('faturamento', ascending=False)
-fig_barras = px.bar(
-    faturamento_modelo,
-    x='produto',
-    y='faturamento',
-    text=faturamento_modelo['faturamento'].apply(lambda x: f'R$ {x:,.2f}'),
-    title="Faturamento Total por Modelo"
-)
-fig_barras.update_traces(textposition='outside')
-fig_barras.update_layout(
-    plot_bgcolor='rgba(0,0,0,0)',
-    paper_bgcolor='rgba(0,0,0,0)',
-    yaxis_gridcolor='rgba(128,128,128,0.1)',
-    xaxis_gridcolor='rgba(128,128,128,0.1)'
-)
-st.plotly_chart(fig_barras, use_container_width=True)
+    st.plotly_chart(fig_barras, use_container_width=True)
 
 # Tabelas detalhadas
-st.subheader("Dados Detalhados")
-tabs = st.tabs(["Resumo por Modelo", "Dados Brutos"])
-
-with tabs[0]:
-    st.dataframe(
-        faturamento_modelo.style.format({
-            'faturamento': 'R$ {:,.2f}',
-            'quantidade': '{:,}'
-        }),
-        hide_index=True
-    )
+with diagnostico.etapa('tabelas', len(df_filtered)) as etapa:
+    st.subheader("Dados Detalhados")
+    tabs = st.tabs(["Resumo por Modelo", "Dados Brutos"])
+
+    with tabs[0]:
+        st.dataframe(
+            faturamento_modelo,
+            column_config={
+                'faturamento': st.column_config.NumberColumn(format=FORMATO_MOEDA_TABELA),
+                'quantidade': st.column_config.NumberColumn(format='%,d'),
+            },
+            hide_index=True
+        )
 
-with tabs[1]:
-    st.dataframe(
-        df_filtered.style.format({
-            'preco_unitario': 'R$ {:,.2f}',
-            'faturamento': 'R$ {:,.2f}'
-        }),
-        hide_index=True
-    )
+    with tabs[1]:
+        # Busca, ordenação e paginação no servidor: só a página visível é enviada ao navegador
+        tcol1, tcol2, tcol3, tcol4 = st.columns([3, 2, 1, 1])
+        with tcol1:
+            busca = st.text_input(
+                "Buscar produto", key='busca_brutos', placeholder="Ex.: Civic", on_change=voltar_primeira_pagina
+            )
+        with tcol2:
+            coluna_ordem = st.selectbox(
+                "Ordenar por", options=colunas_em_reais(df_filtered), key='ordem_brutos', on_change=voltar_primeira_pagina
+            )
+        with tcol3:
+            linhas_por_pagina = st.selectbox(
+                "Linhas por página", LINHAS_POR_PAGINA, index=1, key='linhas_brutos', on_change=voltar_primeira_pagina
+            )
+        with tcol4:
+            st.markdown("<br>", unsafe_allow_html=True)
+            decrescente = st.toggle("Decrescente", key='decrescente_brutos', on_change=voltar_primeira_pagina)
+
+        visao = diagnostico.consultar_cache(
+            'visao_tabela', get_visao_tabela,
+            df.attrs.get('chave'), chave_filtros, busca.strip(), coluna_ordem, decrescente, df_filtered
+        )
+        total_paginas = visao.paginas(linhas_por_pagina)
+        # Filtros ou busca podem reduzir o número de páginas abaixo da página atual
+        if st.session_state.get('pagina_brutos', 1) > total_paginas:
+            st.session_state['pagina_brutos'] = total_paginas
+        pagina = st.number_input("Página", min_value=1, max_value=total_paginas, key='pagina_brutos')
+
+        pagina_brutos = valores_em_reais(visao.pagina(df_filtered, pagina, linhas_por_pagina))
+        st.dataframe(pagina_brutos, column_config=COLUNAS_DADOS_BRUTOS, hide_index=True)
+        inicio = (pagina - 1) * linhas_por_pagina
+        if visao.total:
+            st.caption(
+                f"Linhas {inicio + 1:,}–{inicio + len(pagina_brutos):,} de {visao.total:,} "
+                f"· página {pagina} de {total_paginas}"
+            )
+        else:
+            st.caption("Nenhuma linha encontrada")
+    etapa['linhas_saida'] = len(pagina_brutos)
 
 # Seo exportar removida daqui (já está na sidebar)
 
 # Rodapé
 st.markdown("---")
-st.markdown("Dashboard desenvolvido com Streamlit - Análise de Vendas de Veículos")
\ No newline at end of file
+st.markdown("Dashboard desenvolvido com Streamlit - Análise de Vendas de Veículos")
+
+finalizar_diagnostico(len(df))
\ No newline at end of file
@@ -0,0 +1,111 @@
+import argparse
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Arquivo padrão do log de diagnóstico (um registro JSON por execução do dashboard)
+ARQUIVO_LOG = 'diagnostico_vendas.jsonl'
+
+# Percentis calculados no resumo do log
+PERCENTIS = [50, 90, 99]
+
+# As sessões do Streamlit rodam em threads do mesmo processo: a gravação do log é serializada
+_trava_log = threading.Lock()
+
+
+# Medições de uma execução do dashboard: tempo e linhas de entrada/saída de cada etapa,
+# e acertos/falhas de cada cache consultado
+class Diagnostico:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.etapas = []
+        self.caches = {}
+        self._falhas = {}
+
+    # Mede o bloco como uma etapa; quem chama preenche registro['linhas_saida']
+    @contextmanager
+    def etapa(self, nome, linhas_entrada=None):
+        registro = {'etapa': nome, 'linhas_entrada': linhas_entrada, 'linhas_saida': None}
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro['segundos'] = round(time.perf_counter() - inicio, 6)
+            self.etapas.append(registro)
+
+    def registrar_cache(self, nome, acerto):
+        contagem = self.caches.setdefault(nome, {'acertos': 0, 'falhas': 0})
+        contagem['acertos' if acerto else 'falhas'] += 1
+
+    # Chamado de dentro das funções com st.cache_*: o corpo só executa quando o cache falha
+    def registrar_falha(self, nome):
+        self._falhas[nome] = self._falhas.get(nome, 0) + 1
+
+    # Chama uma função com cache do Streamlit e conta acerto quando o corpo dela não executou
+    def consultar_cache(self, nome, funcao, *args):
+        falhas = self._falhas.get(nome, 0)
+        valor = funcao(*args)
+        self.registrar_cache(nome, self._falhas.get(nome, 0) == falhas)
+        return valor
+
+    @property
+    def total_segundos(self):
+        return time.perf_counter() - self.inicio
+
+    def tabela(self):
+        return pd.DataFrame(self.etapas, columns=['etapa', 'segundos', 'linhas_entrada', 'linhas_saida'])
+
+    def registro(self, sessao, execucao, **extras):
+        return {
+            'momento': datetime.now().isoformat(timespec='milliseconds'),
+            'sessao': sessao,
+            'execucao': execucao,
+            'total_segundos': round(self.total_segundos, 6),
+            'etapas': self.etapas,
+            'caches': self.caches,
+            **extras,
+        }
+
+
+# Acrescenta um registro ao log (JSON por linha)
+def gravar_log(registro, caminho=ARQUIVO_LOG):
+    linha = json.dumps(registro, ensure_ascii=False, default=str)
+    with _trava_log, open(caminho, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(linha + '\n')
+
+
+# Lê o log e calcula, por etapa, o número de medições e os percentis de tempo
+def resumir_log(caminho=ARQUIVO_LOG):
+    tempos = {}
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            if not linha.strip():
+                continue
+            registro = json.loads(linha)
+            tempos.setdefault('total', []).append(registro['total_segundos'])
+            for etapa in registro['etapas']:
+                tempos.setdefault(etapa['etapa'], []).append(etapa['segundos'])
+
+    resumo = pd.DataFrame(
+        [[etapa, len(valores), *np.percentile(valores, PERCENTIS)] for etapa, valores in tempos.items()],
+        columns=['etapa', 'medicoes', *[f'p{p}' for p in PERCENTIS]],
+    )
+    return resumo.sort_values(f'p{PERCENTIS[-1]}', ascending=False, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resume o log de diagnóstico do dashboard (percentis por etapa).')
+    parser.add_argument('log', nargs='?', default=ARQUIVO_LOG, help='Arquivo de log JSON por linha')
+    args = parser.parse_args()
+
+    with pd.option_context('display.float_format', '{:.4f}'.format):
+        print(resumir_log(args.log).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
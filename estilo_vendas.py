@@ -0,0 +1,107 @@
+# HTML e CSS estáticos do dashboard. Ficam neste módulo (importado uma vez por processo) para não
+# serem refeitos a cada nova execução do script do Streamlit.
+
+# CSS personalizado
+CSS_DASHBOARD = """
+<style>
+    /* === KPI Cards === */
+    .card {
+        padding: 15px;
+        border-radius: 10px;
+        margin: 5px;
+        min-height: 100px;
+        height: auto;
+        display: flex;
+        flex-direction: column;
+        justify-content: center;
+        box-sizing: border-box;
+        width: 100%;
+    }
+    .card-title {
+        font-size: 0.85em;
+        color: rgba(255,255,255,0.8);
+        margin-bottom: 8px;
+        line-height: 1.2;
+    }
+    .card-value {
+        font-size: 1.3em;
+        font-weight: bold;
+        color: white;
+        overflow: hidden;
+        text-overflow: ellipsis;
+        line-height: 1.2;
+    }
+    @media (max-width: 1200px) {
+        .card-value { font-size: 1.1em; }
+    }
+    @media (max-width: 992px) {
+        .card { padding: 10px; }
+        .card-title { font-size: 0.8em; }
+        .card-value { font-size: 1em; }
+    }
+    .card-blue { background: linear-gradient(135deg, #6B7FD7 0%, #8662DD 100%); }
+    .card-green { background: linear-gradient(135deg, #4CAF50 0%, #45B649 100%); }
+    .card-orange { background: linear-gradient(135deg, #FF8C42 0%, #F7A440 100%); }
+    .card-red { background: linear-gradient(135deg, #FF6B6B 0%, #FF4949 100%); }
+
+    /* === Sidebar Sections === */
+    .sidebar-section {
+        background: rgba(255,255,255,0.04);
+        border: 1px solid rgba(255,255,255,0.08);
+        border-radius: 10px;
+        padding: 16px 14px 12px;
+        margin-bottom: 12px;
+    }
+    .sidebar-header {
+        display: flex;
+        align-items: center;
+        gap: 8px;
+        margin-bottom: 12px;
+        padding-bottom: 8px;
+        border-bottom: 1px solid rgba(255,255,255,0.06);
+    }
+    .sidebar-header svg {
+        flex-shrink: 0;
+        opacity: 0.7;
+    }
+    .sidebar-header span {
+        font-size: 0.78em;
+        font-weight: 600;
+        text-transform: uppercase;
+        letter-spacing: 1.2px;
+        opacity: 0.6;
+    }
+    /* === Filtros inline === */
+    .filter-bar {
+        background: rgba(255,255,255,0.04);
+        border: 1px solid rgba(255,255,255,0.08);
+        border-radius: 10px;
+        padding: 14px 18px;
+        margin: 10px 0 20px;
+    }
+    .filter-label {
+        display: flex;
+        align-items: center;
+        gap: 6px;
+        font-size: 0.75em;
+        font-weight: 600;
+        text-transform: uppercase;
+        letter-spacing: 1px;
+        opacity: 0.5;
+        margin-bottom: 6px;
+    }
+</style>
+"""
+
+# Ícones SVG (estilo Lucide/shadcn)
+ICON_UPLOAD = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M21 15v4a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2v-4"/><polyline points="17 8 12 3 7 8"/><line x1="12" y1="3" x2="12" y2="15"/></svg>'
+ICON_FILTER = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><polygon points="22 3 2 3 10 12.46 10 19 14 21 14 12.46 22 3"/></svg>'
+ICON_CALENDAR = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><rect x="3" y="4" width="18" height="18" rx="2" ry="2"/><line x1="16" y1="2" x2="16" y2="6"/><line x1="8" y1="2" x2="8" y2="6"/><line x1="3" y1="10" x2="21" y2="10"/></svg>'
+ICON_CAR = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M19 17h2c.6 0 1-.4 1-1v-3c0-.9-.7-1.7-1.5-1.9L18 10l-3-5H9L6 10l-2.5 1.1C2.7 11.3 2 12.1 2 13v3c0 .6.4 1 1 1h2"/><circle cx="7" cy="17" r="2"/><circle cx="17" cy="17" r="2"/></svg>'
+ICON_DOWNLOAD = '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M21 15v4a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2v-4"/><polyline points="7 10 12 15 17 10"/><line x1="12" y1="15" x2="12" y2="3"/></svg>'
+
+
+# Aberturas das seções da barra lateral (fechadas com '</div>') e barra de filtros
+SECAO_FONTE_DADOS = f'<div class="sidebar-section"><div class="sidebar-header">{ICON_UPLOAD}<span>Fonte de Dados</span></div>'
+SECAO_EXPORTAR = f'<div class="sidebar-section"><div class="sidebar-header">{ICON_DOWNLOAD}<span>Exportar</span></div>'
+BARRA_FILTROS = f'<div class="filter-bar"><div class="filter-label">{ICON_FILTER} Filtros</div></div>'
@@ -0,0 +1,207 @@
+import gzip
+import io
+from functools import lru_cache
+from importlib.util import find_spec
+
+import numpy as np
+
+# O openpyxl e o pyarrow.parquet são importados só ao gravar: o dashboard importa este módulo na
+# inicialização e só grava no clique de Download
+
+# pyarrow é opcional: sem ele a exportação lateral só aceita CSV
+PARQUET_DISPONIVEL = find_spec('pyarrow') is not None
+
+# Formatos da exportação de dados: rótulo -> (extensão, tipo MIME); Parquet só com o pyarrow
+FORMATOS_EXPORTACAO = {
+    'CSV': ('.csv', 'text/csv'),
+    'CSV compactado (gzip)': ('.csv.gz', 'application/gzip'),
+    'Excel': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+if PARQUET_DISPONIVEL:
+    FORMATOS_EXPORTACAO['Parquet'] = ('.parquet', 'application/vnd.apache.parquet')
+
+# Limite de linhas de uma aba do Excel (inclui a linha de cabeçalho)
+LIMITE_LINHAS_EXCEL = 1_048_576
+
+# Quantidade de linhas convertidas de cada vez ao escrever um DataFrame
+LINHAS_POR_LOTE = 50_000
+
+
+# Fonte e preenchimento do cabeçalho dos relatórios, criados uma vez
+@lru_cache(maxsize=None)
+def estilos_cabecalho():
+    from openpyxl.styles import Font, PatternFill
+    return Font(bold=True), PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
+
+
+# Workbook em modo somente escrita: as linhas vão direto para o arquivo, sem manter
+# um objeto por célula em memória
+def novo_workbook():
+    from openpyxl import Workbook
+    return Workbook(write_only=True)
+
+
+# Cria uma aba com larguras de coluna definidas (precisa ocorrer antes de escrever as linhas)
+def criar_aba(wb, titulo, larguras):
+    from openpyxl.utils import get_column_letter
+    ws = wb.create_sheet(titulo)
+    for indice, largura in enumerate(larguras, start=1):
+        ws.column_dimensions[get_column_letter(indice)].width = largura
+    return ws
+
+
+# Célula com o estilo de cabeçalho dos relatórios (negrito e fundo cinza)
+def celula_cabecalho(ws, valor, font=None):
+    from openpyxl.cell import WriteOnlyCell
+    fonte, preenchimento = estilos_cabecalho()
+    celula = WriteOnlyCell(ws, value=valor)
+    celula.font = font or fonte
+    celula.fill = preenchimento
+    return celula
+
+
+# Célula com um formato de número do Excel (o valor continua numérico)
+def celula_formatada(ws, valor, formato):
+    from openpyxl.cell import WriteOnlyCell
+    celula = WriteOnlyCell(ws, value=valor)
+    celula.number_format = formato
+    return celula
+
+
+def _numerico(valor):
+    return isinstance(valor, (int, float, np.number)) and not isinstance(valor, (bool, np.bool_))
+
+
+# Aba Resumo: título mesclado (sobre as duas colunas) e cabeçalhos de seção destacados nas linhas informadas.
+# Com formato_numeros, os resultados numéricos recebem esse formato de número do Excel.
+def escrever_resumo(wb, relatorio, linhas_destacadas=(3, 6, 9), formato_numeros=None):
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font
+
+    ws = criar_aba(wb, 'Resumo', [35, 35])
+    ws.merged_cells.add('A1:B1')
+
+    titulo = WriteOnlyCell(ws, value=relatorio.columns[0])
+    titulo.font = Font(bold=True, size=14)
+    titulo.alignment = Alignment(horizontal='center')
+    ws.append([titulo, None])
+
+    for numero, (analise, resultado) in enumerate(relatorio.itertuples(index=False, name=None), start=2):
+        if numero in linhas_destacadas:
+            analise = celula_cabecalho(ws, analise)
+        if formato_numeros and _numerico(resultado):
+            resultado = celula_formatada(ws, resultado, formato_numeros)
+        ws.append([analise, resultado])
+
+
+# Tabela simples com cabeçalho estilizado em uma única aba. Formatos (coluna -> formato de número
+# do Excel) mudam só a exibição das colunas indicadas, que continuam numéricas.
+def escrever_tabela(wb, titulo, df, larguras, formatos=None):
+    ws = criar_aba(wb, titulo, larguras)
+    ws.append([celula_cabecalho(ws, coluna) for coluna in df.columns])
+    formatadas = [
+        (indice, formatos[coluna]) for indice, coluna in enumerate(df.columns) if formatos and coluna in formatos
+    ]
+    for linha in _linhas(df):
+        if formatadas:
+            linha = list(linha)
+            for indice, formato in formatadas:
+                linha[indice] = celula_formatada(ws, linha[indice], formato)
+        ws.append(linha)
+
+
+# Converte um DataFrame em listas de valores Python, coluna a coluna, em lotes
+def _linhas(df):
+    for inicio in range(0, len(df), LINHAS_POR_LOTE):
+        lote = df.iloc[inicio:inicio + LINHAS_POR_LOTE]
+        yield from zip(*(lote[coluna].tolist() for coluna in lote.columns))
+
+
+# Escreve blocos de linhas (DataFrames com as mesmas colunas) em abas de até
+# linhas_por_aba linhas de dados; ao atingir o limite continua em "Titulo 2", "Titulo 3"...
+def escrever_tabela_em_abas(wb, titulo, blocos, largura=15, linhas_por_aba=LIMITE_LINHAS_EXCEL - 1):
+    ws = None
+    linhas_na_aba = 0
+    abas = 0
+    for bloco in blocos:
+        # A primeira aba é criada já no primeiro bloco, para um bloco vazio ainda gerar o cabeçalho
+        if ws is None:
+            abas = 1
+            ws = criar_aba(wb, titulo, [largura] * len(bloco.columns))
+            ws.append([celula_cabecalho(ws, coluna) for coluna in bloco.columns])
+        for linha in _linhas(bloco):
+            if linhas_na_aba >= linhas_por_aba:
+                abas += 1
+                ws = criar_aba(wb, f'{titulo} {abas}', [largura] * len(bloco.columns))
+                ws.append([celula_cabecalho(ws, coluna) for coluna in bloco.columns])
+                linhas_na_aba = 0
+            ws.append(linha)
+            linhas_na_aba += 1
+    return abas
+
+
+# Exportação lateral das linhas brutas para CSV (.csv ou .csv.gz) ou Parquet, um bloco por vez.
+# O formato vem da extensão do caminho; com destino (arquivo binário já aberto, como um BytesIO),
+# os dados são gravados nele em vez de no caminho.
+class ExportadorBlocos:
+    def __init__(self, caminho, destino=None):
+        if caminho.endswith('.parquet') and not PARQUET_DISPONIVEL:
+            raise RuntimeError("Exportação em Parquet requer o pacote pyarrow.")
+        self.caminho = caminho
+        self.destino = destino
+        self._parquet = caminho.endswith('.parquet')
+        self._arquivo = None
+        self._escritor = None
+        self._cabecalho = True
+        self._soltar_destino = False
+
+    def __enter__(self):
+        alvo = self.destino if self.destino is not None else self.caminho
+        if self.caminho.endswith('.gz'):
+            # O gzip não fecha um destino recebido aberto
+            self._arquivo = gzip.open(alvo, 'wt', encoding='utf-8', newline='', compresslevel=6)
+        elif self._parquet:
+            pass
+        elif self.destino is not None:
+            self._arquivo = io.TextIOWrapper(self.destino, encoding='utf-8', newline='')
+            self._soltar_destino = True
+        else:
+            self._arquivo = open(self.caminho, 'w', encoding='utf-8', newline='')
+        return self
+
+    def escrever(self, bloco):
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            if self._escritor is None:
+                alvo = self.destino if self.destino is not None else self.caminho
+                self._escritor = pq.ParquetWriter(alvo, tabela.schema)
+            self._escritor.write_table(tabela.cast(self._escritor.schema))
+        else:
+            bloco.to_csv(self._arquivo, index=False, header=self._cabecalho)
+            self._cabecalho = False
+
+    def __exit__(self, *exc):
+        if self._escritor is not None:
+            self._escritor.close()
+        if self._soltar_destino:
+            # Solta o destino sem fechá-lo, para quem chamou ainda poder lê-lo
+            self._arquivo.flush()
+            self._arquivo.detach()
+        elif self._arquivo is not None:
+            self._arquivo.close()
+
+
+# Grava blocos de linhas em qualquer formato de exportação: .xlsx (abas somente escrita,
+# continuadas ao passar do limite do Excel), .csv, .csv.gz ou .parquet
+def exportar_blocos(blocos, caminho, destino=None, titulo='Dados'):
+    if caminho.endswith('.xlsx'):
+        wb = novo_workbook()
+        escrever_tabela_em_abas(wb, titulo, blocos)
+        wb.save(destino if destino is not None else caminho)
+        return
+    with ExportadorBlocos(caminho, destino) as exportador:
+        for bloco in blocos:
+            exportador.escrever(bloco)
@@ -0,0 +1,21 @@
+import pandas as pd
+
+# Formatação compartilhada de valores em reais: o relatório Excel mantém os valores numéricos com
+# um formato de número, e os rótulos de texto (cartões, gráficos, console) usam formatar_moeda
+
+# Formato de moeda das células do Excel: o valor continua número (somável no Excel)
+FORMATO_MOEDA_EXCEL = '"R$" #,##0.00'
+
+# Formato de moeda das tabelas do dashboard (aplicado pelo navegador, sem converter as células em texto)
+FORMATO_MOEDA_TABELA = 'R$ %,.2f'
+
+# Texto exibido no lugar de um valor ausente (ex.: ticket médio de um recorte sem vendas)
+TEXTO_AUSENTE = '-'
+
+
+# Formata um valor em reais sem depender do locale ("R$ 1,234.56")
+def formatar_moeda(valor):
+    if pd.isna(valor):
+        return TEXTO_AUSENTE
+    return f"R$ {valor:,.2f}"
+
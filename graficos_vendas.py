@@ -0,0 +1,67 @@
+from formatacao_vendas import formatar_moeda
+
+# O plotly.express é importado na primeira figura montada, não na importação do módulo: a
+# inicialização do dashboard (e os KPIs, exibidos antes dos gráficos) não paga por ele
+
+# Título do eixo do faturamento conforme o período de cada ponto da série
+TITULOS_EIXO_PERIODO = {
+    'dia': "Faturamento (R$)",
+    'semana': "Faturamento semanal (R$)",
+    'mês': "Faturamento mensal (R$)",
+}
+
+
+# Gráfico de linha com a evolução do faturamento (por dia, ou por semana/mês já agregados)
+def figura_evolucao(faturamento_diario, periodo='dia'):
+    import plotly.express as px
+    fig_evolucao = px.line(
+        faturamento_diario,
+        x='data',
+        y='faturamento',
+        title="Faturamento ao Longo do Tempo",
+    )
+    fig_evolucao.update_layout(
+        yaxis_title=TITULOS_EIXO_PERIODO[periodo],
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        yaxis_gridcolor='rgba(128,128,128,0.1)',
+        xaxis_gridcolor='rgba(128,128,128,0.1)'
+    )
+    return fig_evolucao
+
+
+# Gráfico de rosca com a distribuição do faturamento por modelo
+def figura_pizza(faturamento_modelo):
+    import plotly.express as px
+    fig_pizza = px.pie(
+        faturamento_modelo,
+        values='faturamento',
+        names='produto',
+        hole=0.6
+    )
+    fig_pizza.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig_pizza
+
+
+# Gráfico de barras com o ranking de faturamento por modelo
+def figura_ranking(faturamento_modelo):
+    import plotly.express as px
+    fig_barras = px.bar(
+        faturamento_modelo,
+        x='produto',
+        y='faturamento',
+        # Um rótulo por modelo (poucas barras): formatados um a um
+        text=faturamento_modelo['faturamento'].map(formatar_moeda),
+        title="Faturamento Total por Modelo"
+    )
+    fig_barras.update_traces(textposition='outside')
+    fig_barras.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        yaxis_gridcolor='rgba(128,128,128,0.1)',
+        xaxis_gridcolor='rgba(128,128,128,0.1)'
+    )
+    return fig_barras
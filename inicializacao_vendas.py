@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Módulos do projeto importados pelo dashboard na inicialização
+MODULOS_DASHBOARD = [
+    'agregados_vendas', 'analise_vendas', 'armazem_vendas', 'cache_vendas', 'carregamento_vendas',
+    'diagnostico_vendas', 'estilo_vendas', 'excel_vendas', 'graficos_vendas', 'memoria_vendas',
+]
+
+# Bibliotecas pesadas que só devem ser importadas ao montar um gráfico ou gravar um Excel
+MODULOS_ADIADOS = ['plotly.express', 'openpyxl']
+
+# Metas (segundos): importação dos módulos do projeto (além de pandas e streamlit), primeira
+# execução do script em um processo novo (com as importações e a carga do arquivo padrão) e
+# reexecução com os caches já preenchidos (mediana)
+META_IMPORTACAO = 0.35
+META_PRIMEIRA_EXECUCAO = 1.0
+META_REEXECUCAO = 0.3
+
+# Executado em um processo novo: primeira execução e reexecuções do dashboard pelo AppTest
+SCRIPT_EXECUCOES = '''
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+import pandas
+app = AppTest.from_file(sys.argv[1], default_timeout=300)
+inicio = time.perf_counter()
+app.run()
+primeira = time.perf_counter() - inicio
+tempos = []
+for _ in range(int(sys.argv[2])):
+    inicio = time.perf_counter()
+    app.run()
+    tempos.append(time.perf_counter() - inicio)
+print(json.dumps({'primeira': primeira, 'reexecucoes': tempos, 'erros': [str(e.value) for e in app.exception]}))
+'''
+
+
+# Lê a saída de "python -X importtime": (módulo, nível de aninhamento, tempo acumulado em segundos)
+def ler_importtime(saida):
+    registros = []
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        _, acumulado, nome = linha.split('|')
+        registros.append((nome.strip(), (len(nome) - len(nome.lstrip()) - 1) // 2, int(acumulado) / 1e6))
+    return registros
+
+
+def _importtime(codigo, diretorio):
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo], cwd=diretorio, capture_output=True, text=True, check=True
+    )
+    return ler_importtime(resultado.stderr)
+
+
+# Tempo de importação dos módulos do projeto, descontado o que pandas e streamlit já importam
+def medir_importacao(diretorio):
+    base = {nome for nome, _, _ in _importtime('import pandas, streamlit', diretorio)}
+    registros = _importtime(f"import pandas, streamlit; import {', '.join(MODULOS_DASHBOARD)}", diretorio)
+    novos = [(nome, nivel, segundos) for nome, nivel, segundos in registros if nome not in base]
+    total = sum(segundos for _, nivel, segundos in novos if nivel == 0)
+    importados = {nome for nome, _, _ in novos} | base
+    adiados = [modulo for modulo in MODULOS_ADIADOS if modulo in importados]
+    mais_lentos = sorted(novos, key=lambda registro: registro[2], reverse=True)
+    return total, adiados, mais_lentos
+
+
+# Primeira execução e reexecuções do dashboard em um processo novo
+def medir_execucoes(diretorio, script, reexecucoes):
+    resultado = subprocess.run(
+        [sys.executable, '-c', SCRIPT_EXECUCOES, os.path.abspath(script), str(reexecucoes)],
+        cwd=diretorio, capture_output=True, text=True, check=True,
+        env={**os.environ, 'PYTHONPATH': os.path.dirname(os.path.abspath(script))},
+    )
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Mede a inicialização do dashboard (python -X importtime, primeira execução e reexecuções).'
+    )
+    parser.add_argument('--diretorio', default='.', help='Diretório com o arquivo_vendas.csv usado pelo dashboard')
+    parser.add_argument('--script', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard_vendas.py'))
+    parser.add_argument('--reexecucoes', type=int, default=5, help='Reexecuções medidas (vale a mediana)')
+    args = parser.parse_args()
+
+    total, adiados, mais_lentos = medir_importacao(os.path.dirname(os.path.abspath(args.script)))
+    print(f"Importação dos módulos do projeto: {total:.3f} s (meta {META_IMPORTACAO} s)")
+    for nome, nivel, segundos in mais_lentos[:8]:
+        print(f"  {segundos:>7.3f} s  {'  ' * nivel}{nome}")
+
+    execucoes = medir_execucoes(args.diretorio, args.script, args.reexecucoes)
+    reexecucao = sorted(execucoes['reexecucoes'])[len(execucoes['reexecucoes']) // 2]
+    print(f"Primeira execução: {execucoes['primeira']:.3f} s (meta {META_PRIMEIRA_EXECUCAO} s)")
+    print(f"Reexecução (mediana de {args.reexecucoes}): {reexecucao:.3f} s (meta {META_REEXECUCAO} s)")
+
+    falhas = [f"{modulo} importado na inicialização" for modulo in adiados]
+    falhas += [f"Erro no dashboard: {erro}" for erro in execucoes['erros']]
+    if total > META_IMPORTACAO:
+        falhas.append(f"importação acima da meta ({total:.3f} s)")
+    if execucoes['primeira'] > META_PRIMEIRA_EXECUCAO:
+        falhas.append(f"primeira execução acima da meta ({execucoes['primeira']:.3f} s)")
+    if reexecucao > META_REEXECUCAO:
+        falhas.append(f"reexecução acima da meta ({reexecucao:.3f} s)")
+    if falhas:
+        print("\nMetas não atingidas:")
+        for falha in falhas:
+            print(f"- {falha}")
+        sys.exit(1)
+    print("\nTodas as metas atingidas.")
+
+
+if __name__ == '__main__':
+    main()
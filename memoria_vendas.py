@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+# Colunas do DataFrame compacto. Preço em centavos (inteiro, exato); o faturamento não é
+# guardado: é quantidade × preço, calculado só para o trecho que precisa dele.
+COLUNAS_COMPACTAS = ['data', 'produto', 'quantidade', 'preco_centavos']
+
+# Colunas do layout completo representadas no compacto (as demais são descartadas)
+COLUNAS_ORIGINAIS = ['data', 'produto', 'quantidade', 'preco_unitario', 'faturamento']
+
+
+# Memória ocupada pelo DataFrame, incluindo o conteúdo dos textos
+def memoria_em_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+# Indica se o DataFrame está na representação compacta
+def compacto(df):
+    return 'preco_centavos' in df.columns
+
+
+# Reduz o DataFrame de vendas à representação compacta: produto como categoria, quantidade no
+# menor inteiro que a comporta, preço em centavos e sem colunas fora das obrigatórias.
+# O relatório de memória (antes, depois e colunas descartadas) fica em df.attrs['memoria']; o
+# "antes" é bytes_antes (a memória do DataFrame como foi lido, antes dos tipos) quando informado.
+def compactar_vendas(df, bytes_antes=None):
+    if compacto(df):
+        return df
+    antes = memoria_em_bytes(df) if bytes_antes is None else bytes_antes
+
+    produto = df['produto']
+    if not isinstance(produto.dtype, pd.CategoricalDtype):
+        produto = produto.astype('category')
+
+    quantidade = df['quantidade']
+    if quantidade.dtype.kind == 'f' and (quantidade % 1 == 0).all():
+        quantidade = quantidade.astype('int64')
+    if quantidade.dtype.kind in 'iu':
+        quantidade = pd.to_numeric(quantidade, downcast='integer')
+
+    centavos = np.round(df['preco_unitario'].to_numpy(dtype='float64') * 100).astype('int64')
+
+    resultado = pd.DataFrame({
+        'data': df['data'],
+        'produto': produto,
+        'quantidade': quantidade,
+        'preco_centavos': pd.to_numeric(pd.Series(centavos, index=df.index), downcast='integer'),
+    })
+    resultado.attrs = dict(df.attrs)
+    resultado.attrs['memoria'] = {
+        'bytes_antes': antes,
+        'bytes_depois': memoria_em_bytes(resultado),
+        'colunas_descartadas': [c for c in df.columns if c not in COLUNAS_ORIGINAIS],
+    }
+    return resultado
+
+
+# Faturamento de cada linha em centavos (int64, exato quando a quantidade é inteira)
+def faturamento_centavos(df):
+    if compacto(df):
+        quantidade = df['quantidade'].to_numpy()
+        centavos = df['preco_centavos'].to_numpy(dtype='int64')
+        if quantidade.dtype.kind in 'iu':
+            return quantidade.astype('int64') * centavos
+        return np.round(quantidade * centavos).astype('int64')
+    return np.round(df['faturamento'].to_numpy(dtype='float64') * 100).astype('int64')
+
+
+# Valores usados para ordenar por uma coluna em reais sem convertê-la (mesma ordem dos centavos)
+def coluna_ordenacao(df, coluna):
+    if compacto(df) and coluna == 'preco_unitario':
+        return df['preco_centavos']
+    if compacto(df) and coluna == 'faturamento':
+        return pd.Series(faturamento_centavos(df), index=df.index)
+    return df[coluna]
+
+
+# Colunas do DataFrame como exibidas e exportadas (preço e faturamento em reais)
+def colunas_em_reais(df):
+    if not compacto(df):
+        return list(df.columns)
+    return [c for c in df.columns if c != 'preco_centavos'] + ['preco_unitario', 'faturamento']
+
+
+# Converte um trecho (página, bloco de exportação) de volta para preço e faturamento em reais
+def valores_em_reais(df):
+    if not compacto(df):
+        return df
+    convertido = df.drop(columns='preco_centavos')
+    convertido['preco_unitario'] = df['preco_centavos'].to_numpy() / 100
+    convertido['faturamento'] = faturamento_centavos(df) / 100
+    return convertido